@@ -1,6 +1,7 @@
 """Configuration management"""
 
 from pathlib import Path
+from pydantic import PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,6 +10,9 @@ class AppConfig(BaseSettings):
 
     # Database
     db_path: str = "./data/memory.db"
+    db_statement_cache_size: int = 256
+    db_read_pool_size: int | None = None  # Defaults to the CPU count
+    db_read_pool_timeout: float = 30.0  # Seconds to wait for a free read connection
 
     # Embeddings
     embed_model: str = "paraphrase-multilingual-mpnet-base-v2"
@@ -18,28 +22,41 @@ class AppConfig(BaseSettings):
     api_host: str = "0.0.0.0"
     api_port: int = 8080
     api_key: str | None = None
+    cors_origins: list[str] = ["*"]  # In production, list the actual origins
 
     # Search
     default_search_limit: int = 5
     similarity_threshold: float = 0.7
+    query_cache_size: int = 1024
+    search_cache_size: int = 256
+    search_cache_similarity: float = 0.98
+    stats_cache_ttl: float = 30.0  # Seconds
 
     # Performance
     max_text_length: int = 10000
     batch_size: int = 32
+    embed_max_batch: int = 64  # Concurrent single-text requests coalesced per encoder call
 
     # Logging
     log_level: str = "info"
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
+    _db_dir_ready: bool = PrivateAttr(default=False)
+
     def fetch_db_directory(self) -> Path:
         """Get database directory path."""
         return Path(self.db_path).parent
 
     def validate_db_directory_exists(self) -> None:
         """Create database directory if it doesn't exist."""
+        if self._db_dir_ready:
+            return
+
         db_dir = self.fetch_db_directory()
-        db_dir.mkdir(parents=True, exist_ok=True)
+        if not db_dir.is_dir():
+            db_dir.mkdir(parents=True, exist_ok=True)
+        self._db_dir_ready = True
 
 
 # Global settings instance
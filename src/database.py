@@ -1,19 +1,109 @@
 """Database management"""
 
-import json
 import logging
+import os
+import queue
 import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Any
+
+import numpy as np
+import orjson
+
 from .config import app_config
 from .models import MemoryRecord
+from .vector_index import EmbeddingIndex
 
 logger = logging.getLogger(__name__)
 
 # Constants
 _ERR_DB_NOT_READY = "Database connection is not initialized"
+_ERR_READ_POOL_EXHAUSTED = "No read-only database connection became free within {timeout} seconds"
 _PROJECT_FILTER_CLAUSE = " AND project = ?"
 
+# Typed column alias: with PARSE_COLNAMES the driver runs the registered
+# converter for "col [TYPE]" while building each row, and names the column "col".
+# Embeddings are left out: vectors are only read by the in-memory index, which
+# bulk-loads them once, so record reads never materialize them.
+_MEMORY_COLUMNS = 'id, text, text_hash, project, tags AS "tags [TAGS_JSON]", created_at, updated_at'
+
+# Hot-path statements. sqlite3 keeps a per-connection LRU of compiled
+# statements keyed by SQL text, so these must stay byte-for-byte constant.
+_SQL_INSERT_MEMORY = """
+    INSERT INTO memories (id, text, text_hash, embedding, project, tags, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# Active memories have unique text hashes; a concurrent duplicate returns no row
+_SQL_INSERT_MEMORY_IF_NEW = _SQL_INSERT_MEMORY + "ON CONFLICT (text_hash) WHERE archived = 0 DO NOTHING RETURNING id"
+_SQL_SELECT_BY_ID = f"SELECT {_MEMORY_COLUMNS} FROM memories WHERE id = ?"
+_SQL_SELECT_BY_HASH = f"SELECT {_MEMORY_COLUMNS} FROM memories WHERE text_hash = ? AND archived = 0"
+_SQL_DELETE_BY_ID = "DELETE FROM memories WHERE id = ?"
+_SQL_ARCHIVE_BY_ID = "UPDATE memories SET archived = 1 WHERE id = ? AND archived = 0"
+_SQL_INSERT_MEMORY_TAG = "INSERT OR IGNORE INTO memory_tags (memory_id, tag) VALUES (?, ?)"
+_SQL_SELECT_BY_IDS = (
+    f"SELECT {_MEMORY_COLUMNS} FROM memories WHERE archived = 0 AND id IN (SELECT value FROM json_each(?))"
+)
+
+# Project/tag filter variants, keyed by (has_project, has_tags). Tags match if ANY
+# tag matches and are bound as a single JSON array, so each variant is one fixed
+# SQL text that the statement cache can reuse.
+_TAG_FILTER_CLAUSE = (
+    " AND id IN (SELECT memory_id FROM memory_tags WHERE tag IN (SELECT value FROM json_each(?)))"
+)
+_FILTER_CLAUSES = {
+    (has_project, has_tags): (_PROJECT_FILTER_CLAUSE if has_project else "")
+    + (_TAG_FILTER_CLAUSE if has_tags else "")
+    for has_project in (False, True)
+    for has_tags in (False, True)
+}
+_SQL_LIST_BY_FILTER = {
+    key: f"SELECT {_MEMORY_COLUMNS} FROM memories WHERE archived = 0{clause}"
+    " ORDER BY created_at DESC, rowid LIMIT ? OFFSET ?"
+    for key, clause in _FILTER_CLAUSES.items()
+}
+# Export streaming resumes each batch after the last (created_at, rowid) it returned,
+# so no read connection is held between batches. Ties keep the rowid order of the
+# (archived, created_at DESC) indexes, which is also the order of the paged listing.
+_SQL_STREAM_START_BY_FILTER = {
+    key: f"SELECT rowid, {_MEMORY_COLUMNS} FROM memories WHERE archived = 0{clause}"
+    " ORDER BY created_at DESC, rowid LIMIT ? OFFSET ?"
+    for key, clause in _FILTER_CLAUSES.items()
+}
+_SQL_STREAM_AFTER_BY_FILTER = {
+    key: f"SELECT rowid, {_MEMORY_COLUMNS} FROM memories WHERE archived = 0{clause}"
+    " AND created_at <= ? AND (created_at < ? OR rowid > ?) ORDER BY created_at DESC, rowid LIMIT ?"
+    for key, clause in _FILTER_CLAUSES.items()
+}
+_SQL_COUNT_BY_FILTER = {
+    key: f"SELECT COUNT(*) FROM memories WHERE archived = 0{clause}" for key, clause in _FILTER_CLAUSES.items()
+}
+
+# Connection tuning applied right after connect (WAL is handled separately)
+_CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+_IN_MEMORY_DB_PATHS = ("", ":memory:")
+_STREAM_BATCH_SIZE = 500
+
+# On-disk layout, tracked through PRAGMA user_version
+_SCHEMA_VERSION = 5
+# Embeddings are stored as a float16 scale followed by one int8 code per dimension
+_EMBEDDING_SCALE_DTYPE = np.float16
+_EMBEDDING_CODE_DTYPE = np.int8
+_EMBEDDING_SCALE_BYTES = np.dtype(_EMBEDDING_SCALE_DTYPE).itemsize
+_EMBEDDING_CODE_MAX = 127
+
+
+# Converters are never called for NULL values
+sqlite3.register_converter("TAGS_JSON", orjson.loads)
+
 
 class DataPersistence:
     """SQLite database manager for memories."""
@@ -22,19 +112,92 @@ class DataPersistence:
         """Initialize database connection."""
         self.db_path = db_path or app_config.db_path
         self.conn: sqlite3.Connection | None = None
+        self.embedding_index = EmbeddingIndex()
+        self._read_pool: queue.Queue[sqlite3.Connection] | None = None
+        self._read_connections: list[sqlite3.Connection] = []
+        self._write_lock = threading.Lock()
 
     def initialize_connection(self) -> None:
         """Create database connection and initialize schema."""
-        # Ensure directory exists
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Ensure directory exists (a single stat in the common case)
+        db_dir = Path(self.db_path).parent
+        if not db_dir.is_dir():
+            db_dir.mkdir(parents=True, exist_ok=True)
 
         # Connect to database
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=app_config.db_statement_cache_size,
+            detect_types=sqlite3.PARSE_COLNAMES,
+        )
         self.conn.row_factory = sqlite3.Row
+        self._apply_connection_pragmas()
         logger.info(f"Database connection established: {self.db_path}")
 
         # Initialize schema
         self._create_tables()
+        self._open_read_pool()
+        self._load_embedding_index()
+
+    def _apply_connection_pragmas(self) -> None:
+        """Switch to WAL journaling and tune the page cache for this connection."""
+        if self.conn is None:
+            raise RuntimeError(_ERR_DB_NOT_READY)
+
+        # WAL needs a real file; in-memory databases keep their default journal
+        if self.db_path not in _IN_MEMORY_DB_PATHS:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+
+        for pragma in _CONNECTION_PRAGMAS:
+            self.conn.execute(pragma)
+
+    def _open_read_pool(self) -> None:
+        """Open read-only connections so concurrent reads do not queue on the writer."""
+        # An in-memory database is private to its connection; reads stay on the writer
+        if self.db_path in _IN_MEMORY_DB_PATHS:
+            return
+
+        pool_size = app_config.db_read_pool_size or os.cpu_count() or 1
+        read_uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        self._read_pool = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            conn = sqlite3.connect(
+                read_uri,
+                uri=True,
+                check_same_thread=False,
+                cached_statements=app_config.db_statement_cache_size,
+                detect_types=sqlite3.PARSE_COLNAMES,
+            )
+            conn.row_factory = sqlite3.Row
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._read_connections.append(conn)
+            self._read_pool.put(conn)
+        logger.info(f"Opened {pool_size} read-only database connections.")
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection, falling back to the writer when there is no pool."""
+        if self._read_pool is None:
+            if self.conn is None:
+                raise RuntimeError(_ERR_DB_NOT_READY)
+            yield self.conn
+            return
+
+        try:
+            conn = self._read_pool.get(timeout=app_config.db_read_pool_timeout)
+        except queue.Empty:
+            raise RuntimeError(_ERR_READ_POOL_EXHAUSTED.format(timeout=app_config.db_read_pool_timeout)) from None
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+
+    def _fetch_rows(self, query: str, params: tuple[Any, ...] = ()) -> list[sqlite3.Row]:
+        """Run a read query on a pooled connection and return all rows."""
+        with self._reader() as conn:
+            return conn.execute(query, params).fetchall()
 
     def _create_tables(self) -> None:
         """Create tables if they don't exist."""
@@ -60,17 +223,120 @@ class DataPersistence:
         """
         )
 
+        # Normalized tags (the JSON column stays for read-side convenience)
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS memory_tags (
+                memory_id TEXT NOT NULL REFERENCES memories(id) ON DELETE CASCADE,
+                tag TEXT NOT NULL,
+                PRIMARY KEY (tag, memory_id)
+            ) WITHOUT ROWID
+        """
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_memory_tags_memory ON memory_tags(memory_id)")
+
         # Indexes for better query performance
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_project ON memories(project)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_created ON memories(created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_hash ON memories(text_hash)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_archived ON memories(archived)")
+        # Composite indexes let list queries walk created_at order with no sort step;
+        # they subsume the old single-column archived index
+        cursor.execute("DROP INDEX IF EXISTS idx_archived")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_archived_project_created ON memories(archived, project, created_at DESC)"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_archived_created ON memories(archived, created_at DESC)")
+
+        self._migrate_schema()
+
+        # Created after the migration, which clears duplicates that would violate it
+        cursor.execute("DROP INDEX IF EXISTS idx_hash")
+        cursor.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_hash_active ON memories(text_hash) WHERE archived = 0"
+        )
 
         self.conn.commit()
         logger.info("Database schema has been verified and initialized.")
 
+    def _migrate_schema(self) -> None:
+        """Upgrade rows written by older versions to the current layout."""
+        if self.conn is None:
+            raise RuntimeError(_ERR_DB_NOT_READY)
+
+        schema_version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version >= _SCHEMA_VERSION:
+            return
+
+        if schema_version < 4:
+            # Re-encode embeddings written by older versions in the current layout
+            rows = self.conn.execute("SELECT id, embedding FROM memories WHERE embedding IS NOT NULL").fetchall()
+            self.conn.executemany(
+                "UPDATE memories SET embedding = ? WHERE id = ?",
+                [
+                    (self._encode_embedding(self._decode_legacy_embedding(row["embedding"], schema_version)), row["id"])
+                    for row in rows
+                ],
+            )
+            logger.info(f"Migrated {len(rows)} embeddings from schema v{schema_version}.")
+
+        if schema_version < 3:
+            # v2 and older kept tags only in the JSON column
+            self.conn.execute(
+                """
+                INSERT OR IGNORE INTO memory_tags (memory_id, tag)
+                SELECT memories.id, tag.value FROM memories, json_each(memories.tags) AS tag
+                WHERE memories.tags IS NOT NULL
+                """
+            )
+            logger.info("Backfilled the memory_tags table.")
+
+        if schema_version < 5:
+            # Older versions deduplicated with a racy lookup; keep the oldest active copy of each text
+            cursor = self.conn.execute(
+                """
+                UPDATE memories SET archived = 1
+                WHERE archived = 0 AND text_hash IS NOT NULL AND rowid NOT IN (
+                    SELECT MIN(rowid) FROM memories
+                    WHERE archived = 0 AND text_hash IS NOT NULL
+                    GROUP BY text_hash
+                )
+                """
+            )
+            if cursor.rowcount > 0:
+                logger.info(f"Archived {cursor.rowcount} duplicate memories.")
+
+        self.conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def _load_embedding_index(self) -> None:
+        """Bulk-load embeddings of active memories into the in-memory index."""
+        cursor = self.execute_query(
+            'SELECT id, embedding, project, tags AS "tags [TAGS_JSON]", created_at FROM memories '
+            "WHERE archived = 0 AND embedding IS NOT NULL"
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            self.embedding_index.clear()
+            return
+
+        # Decode every blob in one pass into a single (N, D) matrix, not N small arrays
+        packed_rows = np.frombuffer(b"".join(row["embedding"] for row in rows), dtype=np.uint8).reshape(len(rows), -1)
+        scales = packed_rows[:, :_EMBEDDING_SCALE_BYTES].copy().view(_EMBEDDING_SCALE_DTYPE).astype(np.float32)
+        codes = packed_rows[:, _EMBEDDING_SCALE_BYTES:].view(_EMBEDDING_CODE_DTYPE)
+        embedding_matrix = codes.astype(np.float32) * scales
+        self.embedding_index.load(
+            [row["id"] for row in rows],
+            embedding_matrix,
+            [row["project"] for row in rows],
+            [row["tags"] or [] for row in rows],
+            [row["created_at"] or 0 for row in rows],
+        )
+
     def close_connection(self) -> None:
         """Close database connection."""
+        self.embedding_index.clear()
+        for conn in self._read_connections:
+            conn.close()
+        self._read_connections = []
+        self._read_pool = None
         if self.conn:
             self.conn.close()
             logger.info("Database connection closed.")
@@ -87,55 +353,78 @@ class DataPersistence:
             raise RuntimeError(_ERR_DB_NOT_READY)
         self.conn.commit()
 
-    def persist_memory_record(self, memory: MemoryRecord) -> None:
-        """Save a memory to database."""
-        embedding_blob = None
-        if memory.embedding:
-            # Convert embedding list to bytes (simple JSON encoding for SQLite)
-            embedding_blob = json.dumps(memory.embedding).encode("utf-8")
-
-        tags_json_str = json.dumps(memory.tags)
-
-        self.execute_query(
-            """
-            INSERT INTO memories (id, text, text_hash, embedding, project, tags, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                memory.id,
-                memory.text,
-                memory.text_hash,
-                embedding_blob,
-                memory.project,
-                tags_json_str,
-                memory.created_at,
-                memory.updated_at,
-            ),
+    def persist_memory_record(self, memory: MemoryRecord) -> bool:
+        """Save a memory to database; False if an active memory with the same text hash already exists."""
+        with self._write_lock:
+            cursor = self.execute_query(_SQL_INSERT_MEMORY_IF_NEW, self._map_memory_object_to_row(memory))
+            is_inserted = cursor.fetchone() is not None
+            if is_inserted and self.conn is not None:
+                self.conn.executemany(_SQL_INSERT_MEMORY_TAG, [(memory.id, tag) for tag in memory.tags])
+            self.commit_transaction()
+        if is_inserted and memory.embedding is not None:
+            self._index_memory(memory)
+        return is_inserted
+
+    def persist_memory_records(self, memories: list[MemoryRecord]) -> list[str]:
+        """Save several memories in a single transaction, skipping duplicates; returns the inserted IDs."""
+        if self.conn is None:
+            raise RuntimeError(_ERR_DB_NOT_READY)
+        if not memories:
+            return []
+
+        inserted_memories: list[MemoryRecord] = []
+        # The connection context manager wraps the batch in one BEGIN/COMMIT
+        with self._write_lock, self.conn:
+            for memory in memories:
+                # Texts already active, or repeated earlier in this batch, are skipped like single saves
+                cursor = self.conn.execute(_SQL_INSERT_MEMORY_IF_NEW, self._map_memory_object_to_row(memory))
+                if cursor.fetchone() is not None:
+                    inserted_memories.append(memory)
+            tag_rows = [(memory.id, tag) for memory in inserted_memories for tag in memory.tags]
+            self.conn.executemany(_SQL_INSERT_MEMORY_TAG, tag_rows)
+
+        for memory in inserted_memories:
+            if memory.embedding is not None:
+                self._index_memory(memory)
+        return [memory.id for memory in inserted_memories]
+
+    def _index_memory(self, memory: MemoryRecord) -> None:
+        """Add a freshly saved memory to the in-memory index with its filter fields."""
+        assert memory.embedding is not None
+        self.embedding_index.add(
+            memory.id, memory.embedding, memory.project, tags=memory.tags, created_at=memory.created_at
         )
-        self.commit_transaction()
 
     def fetch_memory_by_uuid(self, memory_id: str) -> MemoryRecord | None:
         """Retrieve a memory by ID."""
-        cursor = self.execute_query("SELECT * FROM memories WHERE id = ?", (memory_id,))
-        row = cursor.fetchone()
+        rows = self._fetch_rows(_SQL_SELECT_BY_ID, (memory_id,))
 
-        if row is None:
+        if not rows:
             return None
+        row = rows[0]
 
         return self._map_row_to_memory_object(row)
 
     def fetch_memory_by_content_hash(self, text_hash: str) -> MemoryRecord | None:
         """Retrieve a memory by text hash (for deduplication)."""
-        cursor = self.execute_query(
-            "SELECT * FROM memories WHERE text_hash = ? AND archived = 0", (text_hash,)
-        )
-        row = cursor.fetchone()
+        rows = self._fetch_rows(_SQL_SELECT_BY_HASH, (text_hash,))
 
-        if row is None:
+        if not rows:
             return None
+        row = rows[0]
 
         return self._map_row_to_memory_object(row)
 
+    def fetch_memories_by_uuids(self, memory_ids: list[str]) -> list[MemoryRecord]:
+        """Retrieve active memories by ID, preserving the order of the given IDs."""
+        if not memory_ids:
+            return []
+
+        # Bind the IDs as one JSON array so the statement text never changes
+        rows = self._fetch_rows(_SQL_SELECT_BY_IDS, (self._dump_json_text(memory_ids),))
+        records_by_id = {row["id"]: self._map_row_to_memory_object(row) for row in rows}
+        return [records_by_id[memory_id] for memory_id in memory_ids if memory_id in records_by_id]
+
     def retrieve_paginated_memories(
         self,
         project: str | None = None,
@@ -144,57 +433,71 @@ class DataPersistence:
         offset: int = 0,
     ) -> list[MemoryRecord]:
         """List memories with optional filtering."""
-        query = "SELECT * FROM memories WHERE archived = 0"
-        params: list[Any] = []
-
-        if project:
-            query += _PROJECT_FILTER_CLAUSE
-            params.append(project)
-
-        if tags:
-            # Simple tag filtering (checks if ANY tag matches)
-            tag_clauses = " OR ".join(["tags LIKE ?" for _ in tags])
-            query += f" AND ({tag_clauses})"
-            params.extend([f'%"{tag}"%' for tag in tags])
-
-        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        filter_key, params = self._build_filter_params(project, tags)
         params.extend([limit, offset])
 
-        cursor = self.execute_query(query, tuple(params))
-        rows = cursor.fetchall()
+        rows = self._fetch_rows(_SQL_LIST_BY_FILTER[filter_key], tuple(params))
 
         return [self._map_row_to_memory_object(row) for row in rows]
 
+    def iter_paginated_memories(
+        self,
+        project: str | None = None,
+        tags: list[str] | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        batch_size: int = _STREAM_BATCH_SIZE,
+    ) -> Iterator[list[MemoryRecord]]:
+        """Stream memories with optional filtering in batches, borrowing a read connection per batch."""
+        filter_key, filter_params = self._build_filter_params(project, tags)
+        remaining = limit
+        rows = self._fetch_rows(
+            _SQL_STREAM_START_BY_FILTER[filter_key], (*filter_params, min(batch_size, remaining), offset)
+        )
+        while rows:
+            yield [self._map_row_to_memory_object(row) for row in rows]
+            remaining -= len(rows)
+            if remaining <= 0 or len(rows) < batch_size:
+                return
+            last_created_at, last_rowid = rows[-1]["created_at"], rows[-1]["rowid"]
+            rows = self._fetch_rows(
+                _SQL_STREAM_AFTER_BY_FILTER[filter_key],
+                (*filter_params, last_created_at, last_created_at, last_rowid, min(batch_size, remaining)),
+            )
+
     def count_total_memories(self, project: str | None = None, tags: list[str] | None = None) -> int:
         """Count total memories with optional filtering."""
-        query = "SELECT COUNT(*) FROM memories WHERE archived = 0"
-        params: list[Any] = []
+        filter_key, params = self._build_filter_params(project, tags)
 
+        rows = self._fetch_rows(_SQL_COUNT_BY_FILTER[filter_key], tuple(params))
+        return rows[0][0] if rows else 0
+
+    def _build_filter_params(
+        self, project: str | None, tags: list[str] | None
+    ) -> tuple[tuple[bool, bool], list[Any]]:
+        """Pick the precompiled filter variant and bind its parameters."""
+        params: list[Any] = []
         if project:
-            query += _PROJECT_FILTER_CLAUSE
             params.append(project)
-
         if tags:
-            tag_clauses = " OR ".join(["tags LIKE ?" for _ in tags])
-            query += f" AND ({tag_clauses})"
-            params.extend([f'%"{tag}"%' for tag in tags])
-
-        cursor = self.execute_query(query, tuple(params))
-        result = cursor.fetchone()
-        return result[0] if result else 0
+            # All tags travel as one JSON array, whatever their number
+            params.append(self._dump_json_text(tags))
+        return (bool(project), bool(tags)), params
 
     def hard_delete_memory(self, memory_id: str) -> bool:
         """Delete a memory by ID (hard delete)."""
-        cursor = self.execute_query("DELETE FROM memories WHERE id = ?", (memory_id,))
-        self.commit_transaction()
+        with self._write_lock:
+            cursor = self.execute_query(_SQL_DELETE_BY_ID, (memory_id,))
+            self.commit_transaction()
+        self.embedding_index.remove(memory_id)
         return cursor.rowcount > 0
 
     def soft_delete_memory(self, memory_id: str) -> bool:
         """Archive a memory by ID (soft delete)."""
-        cursor = self.execute_query(
-            "UPDATE memories SET archived = 1 WHERE id = ? AND archived = 0", (memory_id,)
-        )
-        self.commit_transaction()
+        with self._write_lock:
+            cursor = self.execute_query(_SQL_ARCHIVE_BY_ID, (memory_id,))
+            self.commit_transaction()
+        self.embedding_index.remove(memory_id)
         return cursor.rowcount > 0
 
     def hard_bulk_delete(self, project: str | None = None, before_timestamp: int | None = None) -> int:
@@ -210,44 +513,46 @@ class DataPersistence:
             query += " AND created_at < ?"
             params.append(before_timestamp)
 
-        cursor = self.execute_query(query, tuple(params))
-        self.commit_transaction()
-        return cursor.rowcount
-
-    def fetch_all_active_memories(self) -> list[MemoryRecord]:
-        """Get all memories (for semantic search, excluding archived)."""
-        cursor = self.execute_query("SELECT * FROM memories WHERE archived = 0 ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        return [self._map_row_to_memory_object(row) for row in rows]
+        query += " RETURNING id"
+        with self._write_lock:
+            cursor = self.execute_query(query, tuple(params))
+            deleted_ids = [row["id"] for row in cursor.fetchall()]
+            self.commit_transaction()
+        self.embedding_index.remove_many(deleted_ids)
+        return len(deleted_ids)
 
     def collect_database_statistics(self) -> dict[str, Any]:
         """Get database statistics."""
-        total = self.count_total_memories()
-
-        # Count by project (excluding archived)
-        cursor = self.execute_query(
+        # Count by project (excluding archived); the NULL group only feeds the total
+        project_rows = self._fetch_rows(
             """
             SELECT project, COUNT(*) as count
             FROM memories
-            WHERE project IS NOT NULL AND archived = 0
+            WHERE archived = 0
             GROUP BY project
             ORDER BY count DESC
             """
         )
-        project_counts = {row["project"]: row["count"] for row in cursor.fetchall()}
-
-        # Get top tags (excluding archived)
-        cursor = self.execute_query("SELECT tags FROM memories WHERE tags IS NOT NULL AND archived = 0")
-        tag_frequencies: dict[str, int] = {}
-        for row in cursor.fetchall():
-            tags_list = json.loads(row["tags"])
-            for tag in tags_list:
-                tag_frequencies[tag] = tag_frequencies.get(tag, 0) + 1
+        total = sum(row["count"] for row in project_rows)
+        project_counts = {row["project"]: row["count"] for row in project_rows if row["project"] is not None}
 
-        top_10_tags = sorted(tag_frequencies.items(), key=lambda item: item[1], reverse=True)[:10]
+        # Get top tags (excluding archived), unnested and ranked inside SQLite
+        tag_rows = self._fetch_rows(
+            """
+            SELECT tag.value AS tag, COUNT(*) AS count
+            FROM memories, json_each(memories.tags) AS tag
+            WHERE memories.tags IS NOT NULL AND memories.archived = 0
+            GROUP BY tag.value
+            ORDER BY count DESC
+            LIMIT 10
+            """
+        )
+        top_10_tags = [row["tag"] for row in tag_rows]
 
-        # Calculate storage size
-        db_file_size = Path(self.db_path).stat().st_size if Path(self.db_path).exists() else 0
+        # Calculate storage size (uncheckpointed pages still live in the WAL file)
+        db_file_size = sum(
+            path.stat().st_size for path in (Path(self.db_path), Path(f"{self.db_path}-wal")) if path.exists()
+        )
         storage_size_mb = db_file_size / (1024 * 1024)
 
         return {
@@ -255,24 +560,62 @@ class DataPersistence:
             "total_projects": len(project_counts),
             "storage_mb": round(storage_size_mb, 2),
             "by_project": project_counts,
-            "top_tags": [tag for tag, _ in top_10_tags],
+            "top_tags": top_10_tags,
         }
 
-    def _map_row_to_memory_object(self, row: sqlite3.Row) -> MemoryRecord:
-        """Convert database row to Memory object."""
-        embedding_data = None
-        if row["embedding"]:
-            embedding_data = json.loads(row["embedding"].decode("utf-8"))
-
-        tag_data = json.loads(row["tags"]) if row["tags"] else []
+    def _dump_json_text(self, value: list[str]) -> str:
+        """Serialize to JSON text (a str, so SQLite stores TEXT that json_each accepts)."""
+        return orjson.dumps(value).decode("utf-8")
+
+    def _encode_embedding(self, embedding: np.ndarray | list[float]) -> bytes:
+        """Serialize an embedding as a float16 scale plus symmetric int8 codes."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        max_abs = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = np.asarray(max_abs / _EMBEDDING_CODE_MAX, dtype=_EMBEDDING_SCALE_DTYPE)
+        if scale == 0:
+            codes = np.zeros(vector.shape, dtype=_EMBEDDING_CODE_DTYPE)
+        else:
+            codes = np.clip(np.rint(vector / np.float32(scale)), -_EMBEDDING_CODE_MAX, _EMBEDDING_CODE_MAX)
+        return scale.tobytes() + codes.astype(_EMBEDDING_CODE_DTYPE).tobytes()
+
+    def _decode_legacy_embedding(self, blob: bytes, schema_version: int) -> np.ndarray:
+        """Deserialize an embedding written under an older schema version."""
+        if schema_version == 0:
+            # v0 stored UTF-8 JSON arrays
+            return np.asarray(orjson.loads(blob), dtype=np.float32)
+        if schema_version == 1:
+            # v1 stored raw float32 buffers
+            return np.frombuffer(blob, dtype=np.float32)
+        # v2 and v3 stored raw float16 buffers
+        return np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+
+    def _map_memory_object_to_row(self, memory: MemoryRecord) -> tuple[Any, ...]:
+        """Convert Memory object to insert parameters."""
+        embedding_blob = None
+        if memory.embedding is not None:
+            embedding_blob = self._encode_embedding(memory.embedding)
+
+        tags_json_str = self._dump_json_text(memory.tags)
+
+        return (
+            memory.id,
+            memory.text,
+            memory.text_hash,
+            embedding_blob,
+            memory.project,
+            tags_json_str,
+            memory.created_at,
+            memory.updated_at,
+        )
 
+    def _map_row_to_memory_object(self, row: sqlite3.Row) -> MemoryRecord:
+        """Convert database row (already decoded by the column converters) to Memory object."""
         return MemoryRecord(
             id=row["id"],
             text=row["text"],
             text_hash=row["text_hash"],
-            embedding=embedding_data,
             project=row["project"],
-            tags=tag_data,
+            tags=row["tags"] or [],
             created_at=row["created_at"],
             updated_at=row["updated_at"],
         )
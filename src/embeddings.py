@@ -1,14 +1,41 @@
 """Embedding generation for semantic search."""
 
+import functools
 import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
 
 from .config import app_config
 
 logger = logging.getLogger(__name__)
 
+_model_load_lock = threading.Lock()
+
+
+@dataclass(slots=True)
+class _PendingEmbedding:
+    """A text waiting for a shared encoder call, and the outcome once it has run."""
+
+    text: str
+    vector: np.ndarray | None = None
+    error: BaseException | None = None
+    done: bool = False
+
+
+@functools.lru_cache(maxsize=1)
+def _load_transformer(model_name: str, device: str) -> SentenceTransformer:
+    """Load a sentence-transformer once per process, in half precision off-CPU."""
+    model = SentenceTransformer(model_name, device=device)
+    if device != "cpu":
+        # sentence-transformers 2.x has no model_kwargs, so cast after loading
+        model.half()
+    return model.eval()
+
 
 class VectorizationService:
     """Service for generating text embeddings."""
@@ -19,16 +46,24 @@ class VectorizationService:
         self.device = app_config.embed_device
         self.model: SentenceTransformer | None = None
         self.embedding_dim = 768  # Multilingual mpnet uses 768 dimensions
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        # Texts queued behind an in-flight encoder call, drained together by the next caller
+        self._pending_embeddings: list[_PendingEmbedding] = []
+        self._encoder_busy = False
+        self._encoder_ready = threading.Condition()
 
     def initialize_transformer(self) -> None:
-        """Load the sentence-transformer model."""
+        """Load the sentence-transformer model (shared by every service instance)."""
         if self.model is None:
-            logger.info(f"Loading embedding model: {self.model_name} on {self.device}")
-            self.model = SentenceTransformer(self.model_name, device=self.device)
-            self.embedding_dim = self.model.get_sentence_embedding_dimension()
-            logger.info(f"Transformer model loaded. Dimension: {self.embedding_dim}")
-
-    def generate_embedding(self, text: str) -> list[float]:
+            with _model_load_lock:
+                if self.model is None:
+                    logger.info(f"Loading embedding model: {self.model_name} on {self.device}")
+                    self.model = _load_transformer(self.model_name, self.device)
+                    self.embedding_dim = self.model.get_sentence_embedding_dimension()
+                    logger.info(f"Transformer model loaded. Dimension: {self.embedding_dim}")
+
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
 
@@ -36,57 +71,110 @@ class VectorizationService:
             text: Input text to encode
 
         Returns:
-            List of floats representing the embedding vector
+            Unit-length float32 embedding vector
         """
         if self.model is None:
             self.initialize_transformer()
 
+        # Requests arriving while the encoder is busy are queued and encoded together
+        # by whichever caller finds it idle next, so concurrent requests share one
+        # forward pass without delaying a request that arrives alone
+        request = _PendingEmbedding(text)
+        with self._encoder_ready:
+            self._pending_embeddings.append(request)
+            while not request.done:
+                if self._encoder_busy:
+                    self._encoder_ready.wait()
+                    continue
+                batch = self._pending_embeddings[: app_config.embed_max_batch]
+                del self._pending_embeddings[: app_config.embed_max_batch]
+                self._encoder_busy = True
+                self._encoder_ready.release()
+                try:
+                    self._encode_pending(batch)
+                finally:
+                    self._encoder_ready.acquire()
+                    self._encoder_busy = False
+                    self._encoder_ready.notify_all()
+
+        if request.error is not None:
+            raise request.error
+        assert request.vector is not None
+        return request.vector
+
+    def _encode_pending(self, batch: list[_PendingEmbedding]) -> None:
+        """Encode queued texts in one model call and hand each caller its own vector."""
         assert self.model is not None
-        embedding_vector = self.model.encode(text, convert_to_numpy=True)
-        return embedding_vector.tolist()
-
-    def generate_embeddings_batch(self, texts: list[str]) -> list[list[float]]:
+        try:
+            # Skip autograd bookkeeping entirely (stricter than encode's own no_grad)
+            with torch.inference_mode():
+                embedding_vectors = self.model.encode(
+                    [request.text for request in batch],
+                    batch_size=len(batch),
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False,
+                )
+            for request, embedding_vector in zip(batch, embedding_vectors):
+                request.vector = embedding_vector.copy()
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            for request in batch:
+                request.done = True
+
+    def generate_query_embedding(self, query: str) -> np.ndarray:
         """
-        Generate embeddings for multiple texts.
+        Generate embedding for a search query, reusing recent results.
+
+        The encoder is deterministic, so a repeated query is served from an LRU
+        cache instead of running the model again.
 
         Args:
-            texts: List of input texts to encode
+            query: Search query text
 
         Returns:
-            List of embedding vectors
+            Unit-length float32 embedding vector (read-only, shared between callers)
         """
-        if self.model is None:
-            self.initialize_transformer()
-
-        assert self.model is not None
-        embedding_vectors = self.model.encode(
-            texts, batch_size=app_config.batch_size, convert_to_numpy=True, show_progress_bar=False
-        )
-        return embedding_vectors.tolist()
-
-    def calculate_cosine_similarity(self, emb1: list[float], emb2: list[float]) -> float:
+        with self._query_cache_lock:
+            cached_vector = self._query_cache.get(query)
+            if cached_vector is not None:
+                self._query_cache.move_to_end(query)
+                return cached_vector
+
+        embedding_vector = self.generate_embedding(query)
+        embedding_vector.flags.writeable = False
+
+        with self._query_cache_lock:
+            self._query_cache[query] = embedding_vector
+            if len(self._query_cache) > app_config.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding_vector
+
+    def generate_embeddings_batch(self, texts: list[str]) -> np.ndarray:
         """
-        Calculate cosine similarity between two embeddings.
+        Generate embeddings for multiple texts.
 
         Args:
-            emb1: First embedding vector
-            emb2: Second embedding vector
+            texts: List of input texts to encode
 
         Returns:
-            Similarity score between 0.0 and 1.0
+            (len(texts), dim) float32 matrix of unit-length embedding vectors
         """
-        vec1 = np.array(emb1)
-        vec2 = np.array(emb2)
-
-        dot_prod = np.dot(vec1, vec2)
-        norm_v1 = np.linalg.norm(vec1)
-        norm_v2 = np.linalg.norm(vec2)
-
-        if norm_v1 == 0 or norm_v2 == 0:
-            return 0.0
+        if self.model is None:
+            self.initialize_transformer()
 
-        similarity_score = dot_prod / (norm_v1 * norm_v2)
-        return float(similarity_score)
+        assert self.model is not None
+        with torch.inference_mode():
+            embedding_vectors = self.model.encode(
+                texts,
+                batch_size=app_config.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        return embedding_vectors
 
 
 # Global embedding service instance
@@ -1,6 +1,10 @@
+import asyncio
 import os
-import requests
-from openai import OpenAI, AuthenticationError, APITimeoutError
+import re
+import threading
+import httpx
+import orjson
+from openai import AsyncOpenAI, AuthenticationError, APITimeoutError
 
 # --- 1. Configuration ---
 
@@ -10,6 +14,16 @@ os.environ["DEEPSEEK_API_KEY"] = "sk-60b1be137abf445c9d23f5ddb899b363"  # Use yo
 # Address of your Memory server (make sure it's running)
 MEMORY_BASE_URL = "http://localhost:8080"
 
+# Turns that are pure small talk never contain facts worth remembering
+SMALL_TALK_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|thx|bye|goodbye|ok|okay|sure|yes|no|cool|great|nice|lol)"
+    r"(\s+(there|again|so much|a lot))?[\s!.?,~]*$",
+    re.IGNORECASE,
+)
+
+# Appended to a streamed reply that broke off after some tokens had arrived
+TRUNCATED_REPLY_MARKER = " [... reply truncated: the connection to DeepSeek was interrupted]"
+
 
 # --- 2. Memory Client  ---
 
@@ -19,60 +33,68 @@ class MemoryClient:
     def __init__(self, base_url):
         self.base_url = base_url
         self.headers = {"Content-Type": "application/json"}
+        # One long-lived client keeps the connection to the server alive between calls
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            headers=self.headers,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+        )
 
     def set_api_key(self, api_key):
         self.headers["X-API-Key"] = api_key
+        self.http.headers["X-API-Key"] = api_key
 
-    def check_health(self):
+    async def close(self):
+        await self.http.aclose()
+
+    async def check_health(self):
         """Check if the Memory server is running"""
         try:
-            response = requests.get(f"{self.base_url}/health")
+            response = await self.http.get("/health")
             response.raise_for_status()
             print(f"Memory server connected successfully (at {self.base_url})")
             return True
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             print(f"Error: Could not connect to Memory server at {self.base_url}")
             print("Please ensure you are running 'uvicorn src.server:app --port 8080' in another terminal")
             return False
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"Memory server error: {e}")
             return False
 
-    def save_memory(self, text, project, tags=None):
+    async def save_memory(self, text, project, tags=None):
         """ (Store) Save a new memory """
         #
-        url = f"{self.base_url}/memory/save"
         payload = {"text": text, "project": project, "tags": tags or []}
         try:
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = await self.http.post("/memory/save", content=orjson.dumps(payload))
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return orjson.loads(response.content)
+        except httpx.HTTPError as e:
             print(f"\n[!!!] Error saving memory (HTTP Error): {e}\n")
             return None
 
-    def search_memory(self, query, project, limit=3, threshold=0.2):
+    async def search_memory(self, query, project, limit=3, threshold=0.2):
         """
         (Retrieve) Search for relevant memories
         """
         #
-        url = f"{self.base_url}/memory/search"
         params = {"q": query, "project": project, "limit": limit, "threshold": threshold}
         try:
-            response = requests.get(url, params=params, headers=self.headers)
+            response = await self.http.get("/memory/search", params=params)
             response.raise_for_status()
-            return response.json().get("results", [])
-        except requests.exceptions.RequestException as e:
+            return orjson.loads(response.content).get("results", [])
+        except httpx.HTTPError as e:
             print(f"\n[!!!] Error searching memory (HTTP Error): {e}\n")
             return []
 
 
 # --- 3. DeepSeek LLM Logic ---
 
-def get_deepseek_response(client, messages, model="deepseek-chat"):
+async def get_deepseek_response(client, messages, model="deepseek-chat"):
     """ (Inject) Call the DeepSeek API """
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
             messages=messages
         )
@@ -88,7 +110,43 @@ def get_deepseek_response(client, messages, model="deepseek-chat"):
         return "Sorry, I am unable to process your request."
 
 
-def summarize_facts_for_memory(client, user_message, ai_response):
+async def stream_deepseek_response(client, messages, model="deepseek-chat"):
+    """ (Inject) Call the DeepSeek API, printing the reply as it is generated """
+    print("AI: ", end="", flush=True)
+    reply_parts = []
+    try:
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                reply_parts.append(token)
+                print(token, end="", flush=True)
+        print()
+        return "".join(reply_parts)
+    except AuthenticationError as e:
+        print(f"\nDeepSeek API key error: {e}")
+        reply = "Sorry, my API key is configured incorrectly."
+    except APITimeoutError:
+        print("\nDeepSeek API request timed out.")
+        reply = "Sorry, the request timed out. Please try again later."
+    except Exception as e:
+        print(f"\nUnknown error calling DeepSeek: {e}")
+        reply = "Sorry, I am unable to process your request."
+    if reply_parts:
+        # Keep what already streamed (and is already on screen) rather than a canned apology
+        print(TRUNCATED_REPLY_MARKER.strip())
+        return "".join(reply_parts) + TRUNCATED_REPLY_MARKER
+    print(f"AI: {reply}")
+    return reply
+
+
+async def summarize_facts_for_memory(client, user_message, ai_response):
     """ (Store) Use DeepSeek to decide what to remember """
     messages = [
         {"role": "system", "content": (
@@ -104,7 +162,7 @@ def summarize_facts_for_memory(client, user_message, ai_response):
         )}
     ]
     try:
-        facts = get_deepseek_response(client, messages)
+        facts = await get_deepseek_response(client, messages)
         facts_stripped = facts.strip()
         if facts_stripped.lower() == "none" or "no new facts" in facts_stripped.lower() or not facts_stripped:
             return None
@@ -116,13 +174,50 @@ def summarize_facts_for_memory(client, user_message, ai_response):
 
 # --- 4. Core Chat Loop ---
 
-def chat_with_memory(memory_client, deepseek_client, user_id, user_message, chat_history):
+# Store-phase tasks still running in the background
+pending_store_tasks = set()
+
+
+def on_store_task_done(task):
+    """ Forget a finished store task and report it if it crashed """
+    pending_store_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"\n[!!!] Background memory store failed: {task.exception()}\n")
+
+
+async def store_new_facts(memory_client, deepseek_client, user_id, user_message, ai_response):
+    """ (Store) Summarize the turn and save any new fact """
+    if SMALL_TALK_PATTERN.match(user_message):
+        # No DeepSeek call for greetings and acknowledgements
+        print("... Small talk, nothing to store ...")
+        return
+
+    print("\n... Requesting DeepSeek to summarize new facts ...")
+    new_fact = await summarize_facts_for_memory(deepseek_client, user_message, ai_response)
+
+    if new_fact:
+        print(f"... Saving new fact to Memory Server: {new_fact} ...")
+        #
+        save_result = await memory_client.save_memory(
+            text=new_fact,
+            project=user_id,
+            tags=["auto-summary", "deepseek"]
+        )
+        if save_result:
+            print(f"    -> Save successful (ID: {save_result.get('id')})")
+        else:
+            print("    -> (!!!) Save FAILED (Check Memory server logs) (!!!)")
+    else:
+        print("... DeepSeek found no new facts to store ...")
+
+
+async def chat_with_memory(memory_client, deepseek_client, user_id, user_message, chat_history):
     """
     Execute the full Retrieve-Inject-Store loop
     """
     # 1. "Retrieve"
     print("... Retrieving memories from Memory Server ...")
-    relevant_memories = memory_client.search_memory(
+    relevant_memories = await memory_client.search_memory(
         query=user_message,
         project=user_id
     )
@@ -148,54 +243,77 @@ def chat_with_memory(memory_client, deepseek_client, user_id, user_message, chat
 
     print(f"--- Building prompt for DeepSeek ({len(messages)} messages total) ---")
 
-    ai_response = get_deepseek_response(deepseek_client, messages)
-    print(f"AI: {ai_response}")
+    ai_response = await stream_deepseek_response(deepseek_client, messages)
 
-    # 3. "Store"
-    print("\n... Requesting DeepSeek to summarize new facts ...")
-    new_fact = summarize_facts_for_memory(deepseek_client, user_message, ai_response)
-
-    if new_fact:
-        print(f"... Saving new fact to Memory Server: {new_fact} ...")
-        #
-        save_result = memory_client.save_memory(
-            text=new_fact,
-            project=user_id,
-            tags=["auto-summary", "deepseek"]
-        )
-        if save_result:
-            print(f"    -> Save successful (ID: {save_result.get('id')})")
-        else:
-            print("    -> (!!!) Save FAILED (Check Memory server logs) (!!!)")
-    else:
-        print("... DeepSeek found no new facts to store ...")
+    # 3. "Store" runs in the background; the reply does not depend on it
+    store_task = asyncio.create_task(
+        store_new_facts(memory_client, deepseek_client, user_id, user_message, ai_response)
+    )
+    pending_store_tasks.add(store_task)
+    store_task.add_done_callback(on_store_task_done)
 
     return ai_response
 
 
 # --- 5. Main Program ---
 
-def main():
+async def read_user_input(prompt):
+    """ Read one line from stdin without blocking the event loop """
+    # A daemon thread rather than the default executor: asyncio.run's shutdown
+    # would otherwise wait on an input() call that Ctrl+C cannot interrupt
+    loop = asyncio.get_running_loop()
+    line_future = loop.create_future()
+
+    def deliver(setter, value):
+        if not line_future.done():
+            setter(value)
+
+    def read_line():
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(deliver, line_future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(deliver, line_future.set_result, line)
+
+    threading.Thread(target=read_line, daemon=True).start()
+    return await line_future
+
+
+async def main():
     if "DEEPSEEK_API_KEY" not in os.environ or os.environ["DEEPSEEK_API_KEY"] == "YOUR_DEEPSEEK_API_KEY_HERE":
         print("Error: Please set your DEEPSEEK_API_KEY on line 11 of the script.")
         return
 
     memory = MemoryClient(MEMORY_BASE_URL)
+    # Chat and summarization calls share one HTTP/2 connection to DeepSeek
+    deepseek_http = httpx.AsyncClient(
+        http2=True,
+        timeout=30.0,
+        limits=httpx.Limits(max_keepalive_connections=8),
+    )
+    try:
+        await run_chat(memory, deepseek_http)
+    finally:
+        # Let any in-flight store phase finish before the clients go away
+        await asyncio.gather(*pending_store_tasks, return_exceptions=True)
+        await deepseek_http.aclose()
+        await memory.close()
+
 
-    if not memory.check_health():
+async def run_chat(memory, deepseek_http):
+    if not await memory.check_health():
         return
 
     try:
         print("Configuring DeepSeek API client...")
-        client = OpenAI(
+        # No probe request: a bad key surfaces on the first chat call
+        client = AsyncOpenAI(
             api_key=os.environ["DEEPSEEK_API_KEY"],
-            base_url="https://api.deepseek.com/v1"
+            base_url="https://api.deepseek.com/v1",
+            http_client=deepseek_http
         )
-        client.models.list()
         print("DeepSeek API client configured successfully.")
-    except AuthenticationError:
-        print("DeepSeek API key is invalid or has expired. Please check.")
-        return
     except Exception as e:
         print(f"DeepSeek API client initialization failed: {e}")
         return
@@ -206,7 +324,11 @@ def main():
 
     USER_ID = ""
     while not USER_ID:
-        USER_ID = input("Please enter your User ID: ")
+        try:
+            USER_ID = await read_user_input("Please enter your User ID: ")
+        except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
+            print("\nExit command detected.")
+            return
         if not USER_ID:
             print("User ID cannot be empty. Please try again.")
 
@@ -218,8 +340,10 @@ def main():
 
     while True:
         try:
-            user_input = input("\nYou: ")
-        except (EOFError, KeyboardInterrupt):
+            # Read input off the event loop so background store tasks keep running;
+            # Ctrl+C under asyncio.run arrives here as a cancellation
+            user_input = await read_user_input("\nYou: ")
+        except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
             print("\nExit command detected.")
             break
 
@@ -230,17 +354,25 @@ def main():
         if not user_input:
             continue
 
-        ai_reply = chat_with_memory(
-            memory_client=memory,
-            deepseek_client=client,
-            user_id=USER_ID,
-            user_message=user_input,
-            chat_history=chat_history
-        )
+        try:
+            ai_reply = await chat_with_memory(
+                memory_client=memory,
+                deepseek_client=client,
+                user_id=USER_ID,
+                user_message=user_input,
+                chat_history=chat_history
+            )
+        except asyncio.CancelledError:
+            print("\nExit command detected.")
+            break
 
         chat_history.append({'role': 'user', 'parts': user_input})
         chat_history.append({'role': 'assistant', 'parts': ai_reply})
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        # A second Ctrl+C while shutdown cleanup is still running
+        print("\nInterrupted.")
\ No newline at end of file
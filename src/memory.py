@@ -1,20 +1,29 @@
 """Core memory operations"""
 
 import logging
+import threading
+import time
 import uuid
-from datetime import datetime
+from collections import OrderedDict
+from collections.abc import Generator, Iterator
 from typing import Any
 
+import numpy as np
+import orjson
+
 from .config import app_config
 from .database import db_layer
 from .embeddings import vectorizer
 from .models import MemoryRecord, RetrievedMemory, StoreMemoryInput
-from .utils import create_content_hash, current_timestamp_seconds, timestamp_to_iso_str
+from .utils import create_content_hash, current_timestamp_seconds, iso_str_to_timestamp, timestamp_to_iso_str
 
 logger = logging.getLogger(__name__)
 
 # Constants
-UTC_OFFSET_STR = "+00:00"
+EXPORT_MAX_RECORDS = 10000
+
+# (project, tags, after_date, before_date, limit, threshold)
+SearchFilterKey = tuple[str | None, tuple[str, ...], str | None, str | None, int, float]
 
 
 class CognitiveStore:
@@ -22,7 +31,14 @@ class CognitiveStore:
 
     def __init__(self) -> None:
         """Initialize memory service."""
-        pass
+        # Recent search results, keyed by (filters, query text); each entry keeps the
+        # query embedding and the index generation the results were computed at
+        self._search_cache: OrderedDict[
+            tuple[SearchFilterKey, str], tuple[np.ndarray, int, list[RetrievedMemory]]
+        ] = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        # Last statistics snapshot as (monotonic time, index generation, stats)
+        self._stats_cache: tuple[float, int, dict[str, Any]] | None = None
 
     def add_new_memory(self, request: StoreMemoryInput) -> tuple[str, bool, str]:
         """
@@ -34,10 +50,6 @@ class CognitiveStore:
         Returns:
             Tuple of (memory_id, is_duplicate, reason)
         """
-        # Validate text length
-        if len(request.text) > app_config.max_text_length:
-            raise ValueError(f"Text content exceeds max length of {app_config.max_text_length}")
-
         # Generate text hash for deduplication
         content_hash = create_content_hash(request.text)
 
@@ -65,8 +77,13 @@ class CognitiveStore:
             updated_at=current_time,
         )
 
-        # Save to database
-        db_layer.persist_memory_record(memory_dto)
+        # Save to database; the unique hash index catches a duplicate saved concurrently
+        if not db_layer.persist_memory_record(memory_dto):
+            existing_record = db_layer.fetch_memory_by_content_hash(content_hash)
+            if existing_record is None:
+                raise RuntimeError("Conflicting duplicate memory record disappeared during save")
+            logger.info(f"Duplicate memory record detected: {existing_record.id}")
+            return existing_record.id, True, "duplicate"
         logger.info(f"New memory record persisted: {new_memory_id}")
 
         return new_memory_id, False, "created"
@@ -97,53 +114,45 @@ class CognitiveStore:
             List of matching memories with scores
         """
         # Generate query embedding
-        query_embedding_vector = vectorizer.generate_embedding(query)
-
-        # Get all memories (with optional filters)
-        all_memory_records = db_layer.fetch_all_active_memories()
-
-        # Filter by project and tags if specified
-        if project:
-            all_memory_records = [m for m in all_memory_records if m.project == project]
-
-        if tags:
-            all_memory_records = [m for m in all_memory_records if any(tag in m.tags for tag in tags)]
-
-        # Filter by date range
-        if after_date:
-            try:
-                after_ts_val = int(
-                    datetime.fromisoformat(after_date.replace("Z", UTC_OFFSET_STR)).timestamp()
-                )
-                all_memory_records = [m for m in all_memory_records if m.created_at >= after_ts_val]
-            except ValueError:
-                pass  # Ignore invalid date format
-
-        if before_date:
-            try:
-                before_ts_val = int(
-                    datetime.fromisoformat(before_date.replace("Z", UTC_OFFSET_STR)).timestamp()
-                )
-                all_memory_records = [m for m in all_memory_records if m.created_at <= before_ts_val]
-            except ValueError:
-                pass  # Ignore invalid date format
-
-        # Calculate similarities
-        scored_results: list[tuple[MemoryRecord, float]] = []
-        for record in all_memory_records:
-            if record.embedding is None:
-                continue
-
-            similarity_score = vectorizer.calculate_cosine_similarity(query_embedding_vector, record.embedding)
-            if similarity_score >= threshold:
-                scored_results.append((record, similarity_score))
+        query_embedding_vector = vectorizer.generate_query_embedding(query)
+
+        # Serve identical or near-identical recent queries with the same filters from cache
+        filter_key: SearchFilterKey = (
+            project,
+            tuple(sorted(tags)) if tags else (),
+            after_date,
+            before_date,
+            limit,
+            threshold,
+        )
+        index_generation = db_layer.embedding_index.generation
+        cached_results = self._lookup_search_cache(filter_key, query, query_embedding_vector, index_generation)
+        if cached_results is not None:
+            return cached_results
+
+        # Parse the date range once; the index applies it before any scoring
+        after_ts_val = self._parse_date_filter(after_date)
+        before_ts_val = self._parse_date_filter(before_date)
+
+        # Score only the active memories that pass the project/tag/date filters
+        # against the in-memory embedding matrix, keeping the top `limit` matches
+        ranked_matches = db_layer.embedding_index.search(
+            query_embedding_vector,
+            threshold,
+            project=project,
+            limit=limit,
+            tags=tags,
+            after_ts=after_ts_val,
+            before_ts=before_ts_val,
+        )
+        score_by_id = dict(ranked_matches)
+        matched_records = db_layer.fetch_memories_by_uuids([memory_id for memory_id, _ in ranked_matches])
 
-        # Sort by score (descending) and take top-k
-        scored_results.sort(key=lambda x: x[1], reverse=True)
-        top_results = scored_results[:limit]
+        # Records are already ordered by score
+        top_results = [(record, score_by_id[record.id]) for record in matched_records]
 
         # Convert to MemoryResult
-        return [
+        search_results = [
             RetrievedMemory(
                 id=memory.id,
                 text=memory.text,
@@ -154,6 +163,66 @@ class CognitiveStore:
             )
             for memory, score in top_results
         ]
+        self._store_search_cache(filter_key, query, query_embedding_vector, index_generation, search_results)
+        return search_results
+
+    def _lookup_search_cache(
+        self, filter_key: SearchFilterKey, query: str, query_embedding: np.ndarray, index_generation: int
+    ) -> list[RetrievedMemory] | None:
+        """Return cached results of the same or a similar enough query with the same filters, if still fresh."""
+        with self._search_cache_lock:
+            # An exact repeat is a single dict lookup; only misses scan for near-duplicates
+            exact_entry = self._search_cache.get((filter_key, query))
+            if exact_entry is not None and exact_entry[1] == index_generation:
+                self._search_cache.move_to_end((filter_key, query))
+                return list(exact_entry[2])
+
+            candidates = [
+                (cache_key, cached_embedding, cached_results)
+                for cache_key, (cached_embedding, cached_generation, cached_results) in self._search_cache.items()
+                if cache_key[0] == filter_key and cached_generation == index_generation
+            ]
+            if not candidates:
+                return None
+
+            # Cached and incoming embeddings are unit length, so the dot product is the cosine
+            similarities = np.stack([cached_embedding for _, cached_embedding, _ in candidates]) @ query_embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] < app_config.search_cache_similarity:
+                return None
+
+            cache_key, _, cached_results = candidates[best]
+            self._search_cache.move_to_end(cache_key)
+            return list(cached_results)
+
+    def _store_search_cache(
+        self,
+        filter_key: SearchFilterKey,
+        query: str,
+        query_embedding: np.ndarray,
+        index_generation: int,
+        search_results: list[RetrievedMemory],
+    ) -> None:
+        """Remember search results, evicting the least recently used entry when full."""
+        with self._search_cache_lock:
+            # Entries from older generations can never hit again
+            stale_keys = [key for key, entry in self._search_cache.items() if entry[1] != index_generation]
+            for key in stale_keys:
+                del self._search_cache[key]
+
+            self._search_cache[(filter_key, query)] = (query_embedding, index_generation, list(search_results))
+            self._search_cache.move_to_end((filter_key, query))
+            if len(self._search_cache) > app_config.search_cache_size:
+                self._search_cache.popitem(last=False)
+
+    def _parse_date_filter(self, date_str: str | None) -> int | None:
+        """Convert an ISO 8601 date filter to a timestamp (None if absent or invalid)."""
+        if not date_str:
+            return None
+        try:
+            return iso_str_to_timestamp(date_str)
+        except ValueError:
+            return None  # Ignore invalid date format
 
     def get_all_memories_paginated(
         self,
@@ -180,25 +249,21 @@ class CognitiveStore:
         """
         page_offset = (page - 1) * limit
 
-        # Get all memories for relevance sorting, or use database pagination for date
+        # Rank through the index for relevance sorting, or use database pagination for date
         if sort == "relevance" and search_query:
-            all_records = db_layer.retrieve_paginated_memories(project=project, tags=tags, limit=10000, offset=0)
-            total_item_count = len(all_records)
-
-            # Generate query embedding and calculate scores
-            query_emb = vectorizer.generate_embedding(search_query)
-            memories_with_scores = []
-
-            for record in all_records:
-                if record.embedding:
-                    relevance_score = vectorizer.calculate_cosine_similarity(query_emb, record.embedding)
-                    memories_with_scores.append((record, relevance_score))
-
-            # Sort by relevance score
-            memories_with_scores.sort(key=lambda x: x[1], reverse=True)
+            # Rank with an exact scan, keeping only the candidates up to the end of this page;
+            # approximate top-k is not prefix-stable, so graph answers would repeat or skip rows
+            query_emb = vectorizer.generate_query_embedding(search_query)
+            ranked_matches = db_layer.embedding_index.search(
+                query_emb, threshold=-1.0, project=project, limit=page_offset + limit, tags=tags, exact=True
+            )
+            total_item_count = db_layer.count_total_memories(project=project, tags=tags)
 
-            # Paginate
-            paginated_list = memories_with_scores[page_offset : page_offset + limit]
+            # Paginate, then load only this page's records
+            page_matches = ranked_matches[page_offset:]
+            score_by_id = dict(page_matches)
+            page_records = db_layer.fetch_memories_by_uuids([memory_id for memory_id, _ in page_matches])
+            paginated_list = [(record, score_by_id[record.id]) for record in page_records]
 
             final_results = [
                 RetrievedMemory(
@@ -261,8 +326,7 @@ class CognitiveStore:
         cutoff_timestamp = None
         if before_date:
             try:
-                dt_obj = datetime.fromisoformat(before_date.replace("Z", UTC_OFFSET_STR))
-                cutoff_timestamp = int(dt_obj.timestamp())
+                cutoff_timestamp = iso_str_to_timestamp(before_date)
             except ValueError as e:
                 raise ValueError(f"Date format is invalid: {before_date}") from e
 
@@ -274,14 +338,26 @@ class CognitiveStore:
         """
         Get memory statistics.
 
+        Snapshots are reused for `stats_cache_ttl` seconds. Every write to the active
+        set bumps the index generation, which retires the snapshot immediately.
+
         Returns:
             Dictionary with stats
         """
-        return db_layer.collect_database_statistics()
-
-    def dump_memories_to_format(
-        self, format: str = "json", project: str | None = None
-    ) -> str | dict[str, Any]:
+        index_generation = db_layer.embedding_index.generation
+        cached_stats = self._stats_cache
+        if (
+            cached_stats is not None
+            and cached_stats[1] == index_generation
+            and time.monotonic() - cached_stats[0] < app_config.stats_cache_ttl
+        ):
+            return cached_stats[2]
+
+        stats_data = db_layer.collect_database_statistics()
+        self._stats_cache = (time.monotonic(), index_generation, stats_data)
+        return stats_data
+
+    def dump_memories_to_format(self, format: str = "json", project: str | None = None) -> Generator[bytes, None, None]:
         """
         Export memories to JSON or Markdown.
 
@@ -290,13 +366,26 @@ class CognitiveStore:
             project: Optional project filter
 
         Returns:
-            Exported data as string or dict
+            Iterator of encoded chunks, produced as records are read from the database
         """
-        all_memories = db_layer.retrieve_paginated_memories(project=project, limit=10000)
-
         if format == "json":
-            return {
-                "memories": [
+            return self._stream_json_export(project)
+        elif format == "markdown":
+            return self._stream_markdown_export(project)
+        else:
+            raise ValueError(f"Format not supported: {format}")
+
+    def _iter_export_batches(self, project: str | None) -> Iterator[list[MemoryRecord]]:
+        """Yield the exported memories in batches, newest first."""
+        return db_layer.iter_paginated_memories(project=project, limit=EXPORT_MAX_RECORDS)
+
+    def _stream_json_export(self, project: str | None) -> Generator[bytes, None, None]:
+        """Yield the JSON export one batch of memories at a time."""
+        # Nothing is emitted before the first batch is read, so query errors surface on the first chunk
+        separator = b'{"memories":['
+        for batch in self._iter_export_batches(project):
+            yield separator + b",".join(
+                orjson.dumps(
                     {
                         "id": m.id,
                         "text": m.text,
@@ -304,21 +393,32 @@ class CognitiveStore:
                         "tags": m.tags,
                         "created_at": timestamp_to_iso_str(m.created_at),
                     }
-                    for m in all_memories
-                ]
-            }
-        elif format == "markdown":
-            md_lines = ["# Memory Export\n"]
-            for m in all_memories:
-                md_lines.append(f"## {m.id}")
-                md_lines.append(f"**Project**: {m.project or 'None'}")
-                md_lines.append(f"**Tags**: {', '.join(m.tags) if m.tags else 'None'}")
-                md_lines.append(f"**Created**: {timestamp_to_iso_str(m.created_at)}")
-                md_lines.append(f"\n{m.text}\n")
-                md_lines.append("---\n")
-            return "\n".join(md_lines)
-        else:
-            raise ValueError(f"Format not supported: {format}")
+                )
+                for m in batch
+            )
+            separator = b","
+        yield b"]}" if separator == b"," else b'{"memories":[]}'
+
+    def _stream_markdown_export(self, project: str | None) -> Generator[bytes, None, None]:
+        """Yield the Markdown export one batch of memories at a time."""
+        # The title travels with the first batch, after its query has run
+        header = "# Memory Export\n"
+        for batch in self._iter_export_batches(project):
+            yield (
+                header
+                + "".join(
+                    f"\n## {m.id}"
+                    f"\n**Project**: {m.project or 'None'}"
+                    f"\n**Tags**: {', '.join(m.tags) if m.tags else 'None'}"
+                    f"\n**Created**: {timestamp_to_iso_str(m.created_at)}"
+                    f"\n\n{m.text}\n"
+                    "\n---\n"
+                    for m in batch
+                )
+            ).encode("utf-8")
+            header = ""
+        if header:
+            yield header.encode("utf-8")
 
 
 # Global memory service instance
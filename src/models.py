@@ -1,7 +1,12 @@
-"""Pydantic models for request/response validation."""
+"""Pydantic models for request/response validation, plus internal records."""
 
+from dataclasses import dataclass
+
+import numpy as np
 from pydantic import BaseModel, Field
 
+from .config import app_config
+
 # Constants
 _PROJECT_FILTER_DESCRIPTION = "Filter by a specific project"
 
@@ -10,7 +15,8 @@ _PROJECT_FILTER_DESCRIPTION = "Filter by a specific project"
 class StoreMemoryInput(BaseModel):
     """DTO for saving a new memory."""
 
-    text: str = Field(..., max_length=10000, description="The textual content of the memory")
+    # The configured limit is enforced at parse time, before any embedding work
+    text: str = Field(..., max_length=app_config.max_text_length, description="The textual content of the memory")
     project: str | None = Field(None, max_length=100, description="Categorization project")
     tags: list[str] = Field(default_factory=list, description="List of associated tags")
 
@@ -111,13 +117,15 @@ class StatisticsResponse(BaseModel):
 
 
 # Internal models
-class MemoryRecord(BaseModel):
+# Built for every row read from our own database, so these skip Pydantic validation
+@dataclass(slots=True, frozen=True, kw_only=True)
+class MemoryRecord:
     """Internal data structure for a memory."""
 
     id: str
     text: str
     text_hash: str
-    embedding: list[float] | None = None
+    embedding: np.ndarray | list[float] | None = None
     project: str | None = None
     tags: list[str]
     created_at: int
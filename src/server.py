@@ -1,12 +1,17 @@
 """FastAPI application"""
 
 import logging
-from collections.abc import AsyncGenerator
+import re
+from collections.abc import AsyncGenerator, Generator
 from contextlib import asynccontextmanager
+from typing import Annotated
 from fastapi import FastAPI, HTTPException, Query, Security
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import APIKeyHeader
+from starlette.types import Receive, Scope, Send
 from .config import app_config
 from .database import db_layer
 from .embeddings import vectorizer
@@ -32,6 +37,8 @@ logger = logging.getLogger(__name__)
 # Constants
 GENERIC_SERVER_ERROR = "An unexpected internal server error occurred"
 PROJECT_FILTER_DESC = "Filter by project"
+GZIP_MINIMUM_SIZE = 1024  # Bytes; smaller bodies are not worth compressing
+TAG_SEPARATOR_PATTERN = re.compile(r"\s*,\s*")
 
 
 @asynccontextmanager
@@ -57,28 +64,75 @@ app = FastAPI(
     description="Persistent semantic memory server for MCP",
     version="0.1.0",
     lifespan=app_lifespan_manager,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify actual origins
+    allow_origins=app_config.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+# Compress list, search and export payloads for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE)
+
 # Optional API key security
 api_key_security_schema = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
-def validate_api_key(api_key: str | None = Security(api_key_security_schema)) -> bool:
-    """Verify API key if configured."""
-    if app_config.api_key and (not api_key or api_key != app_config.api_key):
+def _check_api_key(api_key: str | None = Security(api_key_security_schema)) -> bool:
+    """Verify the configured API key."""
+    if not api_key or api_key != app_config.api_key:
         raise HTTPException(status_code=403, detail="Invalid or missing API key")
     return True
 
 
+def _allow_without_api_key() -> bool:
+    """Accept every request when no API key is configured."""
+    return True
+
+
+# The key is fixed at startup, so pick the checker once instead of branching on every request
+validate_api_key = _check_api_key if app_config.api_key else _allow_without_api_key
+RequireApiKey = Annotated[bool, Security(validate_api_key)]
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """Streaming response that closes its chunk iterator however the response ends, disconnects included."""
+
+    def __init__(self, content: Generator[bytes, None, None], media_type: str) -> None:
+        super().__init__(content, media_type=media_type)
+        self._chunks = content
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # A half-read export still holds a pooled read connection until it is closed
+            await run_in_threadpool(self._chunks.close)
+
+
+def iter_export_chunks(first_chunk: bytes, chunks: Generator[bytes, None, None]) -> Generator[bytes, None, None]:
+    """Yield an already-primed export, logging errors raised after the response has started."""
+    try:
+        yield first_chunk
+        yield from chunks
+    except Exception as e:
+        # Headers are already sent, so the client only sees a truncated body
+        logger.error("Error while streaming memory export: %s", e)
+        raise
+    finally:
+        chunks.close()
+
+
+def parse_tags_param(tags: str | None) -> list[str] | None:
+    """Split a comma-separated tags query parameter, trimming whitespace around each tag."""
+    return TAG_SEPARATOR_PATTERN.split(tags.strip()) if tags else None
+
+
 @app.get("/")
 def get_root() -> dict[str, str]:
     """Root endpoint."""
@@ -89,9 +143,12 @@ def get_root() -> dict[str, str]:
     }
 
 
+# Handlers that embed, score or hit SQLite are plain `def`, so FastAPI runs them in its
+# threadpool and the event loop stays free while the model and NumPy release the GIL
+
 @app.post("/memory/save", response_model=StoreMemoryOutput)
-async def handle_save_memory(
-    request: StoreMemoryInput, authenticated: bool = Security(validate_api_key)
+def handle_save_memory(
+    request: StoreMemoryInput, authenticated: RequireApiKey
 ) -> StoreMemoryOutput:
     """
     Save a new memory.
@@ -108,12 +165,12 @@ async def handle_save_memory(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error during memory save operation: {e}")
+        logger.error("Error during memory save operation: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
 
 @app.get("/memory/search", response_model=QueryMemoryOutput)
-async def handle_search_memory(
+def handle_search_memory(
     q: str = Query(..., description="Search query"),
     project: str | None = Query(None, description=PROJECT_FILTER_DESC),
     tags: str | None = Query(None, description="Comma-separated tags"),
@@ -138,8 +195,7 @@ async def handle_search_memory(
         QueryMemoryOutput with matching memories
     """
     try:
-        # Parse tags if provided
-        tags_list = [t.strip() for t in tags.split(",")] if tags else None
+        tags_list = parse_tags_param(tags)
 
         search_results = cognitive_store_instance.find_relevant_memories(
             query=q,
@@ -153,12 +209,12 @@ async def handle_search_memory(
 
         return QueryMemoryOutput(query=q, results=search_results, total=len(search_results))
     except Exception as e:
-        logger.error(f"Error during memory search operation: {e}")
+        logger.error("Error during memory search operation: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
 
 @app.get("/memory/list", response_model=ListMemoryOutput)
-async def handle_list_memories(
+def handle_list_memories(
     project: str | None = Query(None, description=PROJECT_FILTER_DESC),
     tags: str | None = Query(None, description="Comma-separated tags"),
     page: int = Query(1, ge=1, description="Page number"),
@@ -181,8 +237,7 @@ async def handle_list_memories(
         ListMemoryOutput with paginated memories
     """
     try:
-        # Parse tags if provided
-        tags_list = [t.strip() for t in tags.split(",")] if tags else None
+        tags_list = parse_tags_param(tags)
 
         memories_list, total_items_count = cognitive_store_instance.get_all_memories_paginated(
             project=project, tags=tags_list, page=page, limit=limit, sort=sort, search_query=q
@@ -194,13 +249,13 @@ async def handle_list_memories(
             memories=memories_list, page=page, total_pages=num_total_pages, total_items=total_items_count
         )
     except Exception as e:
-        logger.error(f"Error during memory list operation: {e}")
+        logger.error("Error during memory list operation: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
 
 @app.delete("/memory/{memory_id}", response_model=DeletionResult)
-async def handle_delete_memory(
-    memory_id: str, authenticated: bool = Security(validate_api_key)
+def handle_delete_memory(
+    memory_id: str, authenticated: RequireApiKey
 ) -> DeletionResult:
     """
     Delete a memory by ID (hard delete).
@@ -219,13 +274,13 @@ async def handle_delete_memory(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error during memory delete operation: {e}")
+        logger.error("Error during memory delete operation: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
 
 @app.post("/memory/{memory_id}/archive", response_model=DeletionResult)
-async def handle_archive_memory(
-    memory_id: str, authenticated: bool = Security(validate_api_key)
+def handle_archive_memory(
+    memory_id: str, authenticated: RequireApiKey
 ) -> DeletionResult:
     """
     Archive a memory by ID (soft delete).
@@ -248,13 +303,13 @@ async def handle_archive_memory(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error during memory archive operation: {e}")
+        logger.error("Error during memory archive operation: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
 
 @app.post("/memory/bulk-delete", response_model=BulkRemovalOutput)
-async def handle_bulk_delete_memories(
-    request: BulkRemovalRequest, authenticated: bool = Security(validate_api_key)
+def handle_bulk_delete_memories(
+    request: BulkRemovalRequest, authenticated: RequireApiKey
 ) -> BulkRemovalOutput:
     """
     Bulk delete memories.
@@ -273,12 +328,12 @@ async def handle_bulk_delete_memories(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error during memory bulk delete operation: {e}")
+        logger.error("Error during memory bulk delete operation: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
 
 @app.get("/memory/stats", response_model=StatisticsResponse)
-async def handle_get_stats() -> StatisticsResponse:
+def handle_get_stats() -> StatisticsResponse:
     """
     Get memory statistics.
 
@@ -289,15 +344,15 @@ async def handle_get_stats() -> StatisticsResponse:
         stats_data = cognitive_store_instance.fetch_service_analytics()
         return StatisticsResponse(**stats_data)
     except Exception as e:
-        logger.error(f"Error retrieving statistics: {e}")
+        logger.error("Error retrieving statistics: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
 
 @app.get("/memory/export", response_model=None)
-async def handle_export_memories(
+def handle_export_memories(
     format: str = Query("json", pattern="^(json|markdown)$", description="Export format"),
     project: str | None = Query(None, description=PROJECT_FILTER_DESC),
-) -> JSONResponse | PlainTextResponse:
+) -> StreamingResponse:
     """
     Export memories to JSON or Markdown.
 
@@ -310,17 +365,16 @@ async def handle_export_memories(
     """
     try:
         exported_data = cognitive_store_instance.dump_memories_to_format(format=format, project=project)
-
-        if format == "json":
-            return JSONResponse(content=exported_data)
-        else:
-            # Type assertion to help type checker
-            content_data = exported_data if isinstance(exported_data, str) else ""
-            return PlainTextResponse(content=content_data, media_type="text/markdown")
+        # Run the export query and encode the first chunk here, so setup errors still become a 500
+        first_chunk = next(exported_data)
     except Exception as e:
-        logger.error(f"Error during memory export: {e}")
+        logger.error("Error during memory export: %s", e)
         raise HTTPException(status_code=500, detail=GENERIC_SERVER_ERROR)
 
+    # The rest is encoded and sent as it is read instead of being built up in memory
+    media_type = "application/json" if format == "json" else "text/markdown"
+    return ClosingStreamingResponse(iter_export_chunks(first_chunk, exported_data), media_type=media_type)
+
 
 @app.get("/health")
 async def health_check_endpoint() -> dict[str, str]:
@@ -1,8 +1,12 @@
 """Utility functions"""
 
+import functools
 import hashlib
+import time
 from datetime import datetime
 
+UTC_OFFSET_STR = "+00:00"
+
 
 def create_content_hash(content: str) -> str:
     """Generate SHA256 hash of text for deduplication."""
@@ -10,10 +14,17 @@ def create_content_hash(content: str) -> str:
 
 
 def current_timestamp_seconds() -> int:
-    """Get current Unix timestamp."""
-    return int(datetime.now().timestamp())
+    """Get current Unix timestamp (read straight from the clock, no datetime object)."""
+    return int(time.time())
 
 
+@functools.lru_cache(maxsize=65536)
 def timestamp_to_iso_str(ts: int) -> str:
-    """Convert Unix timestamp to ISO 8601 string."""
-    return datetime.fromtimestamp(ts).isoformat() + "Z"
\ No newline at end of file
+    """Convert Unix timestamp to ISO 8601 string (memoized; rows often share a second)."""
+    return datetime.fromtimestamp(ts).isoformat() + "Z"
+
+
+@functools.lru_cache(maxsize=1024)
+def iso_str_to_timestamp(iso_str: str) -> int:
+    """Convert an ISO 8601 string to a Unix timestamp (memoized; raises ValueError if invalid)."""
+    return int(datetime.fromisoformat(iso_str.replace("Z", UTC_OFFSET_STR)).timestamp())
@@ -0,0 +1,426 @@
+"""In-memory embedding matrix for semantic search."""
+
+import logging
+import threading
+
+import hnswlib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Constants
+_INITIAL_CAPACITY = 1024
+_VECTOR_DTYPE = np.float32
+_TIMESTAMP_DTYPE = np.int64
+# Below this many live vectors an exact scan is as fast as walking the graph
+_ANN_MIN_VECTORS = 1024
+_ANN_M = 16
+_ANN_EF_CONSTRUCTION = 200
+_ANN_EF_SEARCH = 64
+# Filtered graph walks degrade as the filter gets selective; scan below this pass rate
+_ANN_MIN_FILTER_PASS_RATE = 0.1
+
+
+class EmbeddingIndex:
+    """
+    Contiguous (N, D) matrix of L2-normalized embeddings for active memories.
+
+    Rows are also partitioned by project and by tag, and carry their creation
+    time, so filtered searches only score the rows that pass every filter
+    instead of the whole matrix. Once the index is large enough, top-k searches
+    walk an HNSW graph over the same rows instead of scanning them, as long as
+    the filters leave a large enough share of the rows.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self._vectors: np.ndarray | None = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._created_at = np.zeros(0, dtype=_TIMESTAMP_DTYPE)
+        self._ids: list[str] = []
+        self._projects: list[str | None] = []
+        self._tags: list[list[str]] = []
+        self._row_by_id: dict[str, int] = {}
+        self._rows_by_project: dict[str | None, list[int]] = {}
+        self._rows_by_tag: dict[str, list[int]] = {}
+        self._size = 0
+        self._graph: hnswlib.Index | None = None
+        self._generation = 0
+        # Bumped whenever rows are renumbered, which invalidates graph labels
+        self._layout_version = 0
+        # Layout version of the graph build running in the background, if any
+        self._graph_build_layout: int | None = None
+        # Request handlers run in a threadpool, so readers and writers serialize here
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Number of live vectors in the index."""
+        return len(self._row_by_id)
+
+    @property
+    def generation(self) -> int:
+        """Counter bumped on every change, so callers can tell when cached results went stale."""
+        return self._generation
+
+    def clear(self) -> None:
+        """Drop every vector from the index."""
+        with self._lock:
+            self._vectors = None
+            self._alive = np.zeros(0, dtype=bool)
+            self._created_at = np.zeros(0, dtype=_TIMESTAMP_DTYPE)
+            self._ids = []
+            self._projects = []
+            self._tags = []
+            self._row_by_id = {}
+            self._rows_by_project = {}
+            self._rows_by_tag = {}
+            self._size = 0
+            self._graph = None
+            self._generation += 1
+            self._layout_version += 1
+
+    def load(
+        self,
+        memory_ids: list[str],
+        embeddings: np.ndarray | list[np.ndarray],
+        projects: list[str | None],
+        tags: list[list[str]],
+        created_at: list[int],
+    ) -> None:
+        """
+        Replace the index contents with a bulk-loaded set of vectors.
+
+        Args:
+            memory_ids: Memory UUIDs, aligned with embeddings
+            embeddings: (N, D) embedding matrix (or list of vectors), one row per memory
+            projects: Project of each memory, aligned with embeddings
+            tags: Tags of each memory, aligned with embeddings
+            created_at: Creation timestamp of each memory, aligned with embeddings
+        """
+        with self._lock:
+            self.clear()
+            if not memory_ids:
+                return
+
+            matrix = self._normalize_rows(np.asarray(embeddings, dtype=_VECTOR_DTYPE))
+            self._allocate(max(_INITIAL_CAPACITY, len(memory_ids)), matrix.shape[1])
+            assert self._vectors is not None
+
+            self._vectors[: len(memory_ids)] = matrix
+            self._alive[: len(memory_ids)] = True
+            self._created_at[: len(memory_ids)] = created_at
+            self._set_rows(list(memory_ids), list(projects), list(tags))
+            # Bulk loads happen at startup, before any search can run
+            self._rebuild_graph(background=False)
+            logger.info(f"Embedding index loaded with {self._size} vectors.")
+
+    def add(
+        self,
+        memory_id: str,
+        embedding: np.ndarray | list[float],
+        project: str | None = None,
+        tags: list[str] | None = None,
+        created_at: int = 0,
+    ) -> None:
+        """Append a single vector (amortized O(1) via capacity doubling)."""
+        with self._lock:
+            # Rows are normalized on the way in, which also covers vectors stored
+            # by versions that did not normalize at encode time
+            vector = self._normalize_rows(np.asarray(embedding, dtype=_VECTOR_DTYPE)[None, :])[0]
+            memory_tags = list(tags or [])
+
+            if self._vectors is None:
+                self._allocate(_INITIAL_CAPACITY, vector.shape[0])
+            elif self._size == self._vectors.shape[0]:
+                self._make_room()
+            assert self._vectors is not None
+
+            self.remove(memory_id)
+            row = self._size
+            self._vectors[row] = vector
+            self._alive[row] = True
+            self._created_at[row] = created_at
+            self._ids.append(memory_id)
+            self._projects.append(project)
+            self._tags.append(memory_tags)
+            self._row_by_id[memory_id] = row
+            self._rows_by_project.setdefault(project, []).append(row)
+            for tag in memory_tags:
+                self._rows_by_tag.setdefault(tag, []).append(row)
+            self._size += 1
+            self._generation += 1
+
+            if self._graph is not None:
+                self._graph.add_items(vector[None, :], [row])
+            elif len(self._row_by_id) >= _ANN_MIN_VECTORS:
+                self._rebuild_graph()
+
+    def remove(self, memory_id: str) -> None:
+        """Tombstone a vector; its row is reclaimed on the next compaction."""
+        with self._lock:
+            row = self._row_by_id.pop(memory_id, None)
+            if row is not None:
+                self._alive[row] = False
+                self._generation += 1
+                if self._graph is not None:
+                    self._graph.mark_deleted(row)
+
+    def remove_many(self, memory_ids: list[str]) -> None:
+        """Tombstone several vectors at once, clearing their alive flags in one masked write."""
+        with self._lock:
+            popped_rows = (self._row_by_id.pop(memory_id, None) for memory_id in memory_ids)
+            rows = [row for row in popped_rows if row is not None]
+            if not rows:
+                return
+            self._alive[rows] = False
+            self._generation += 1
+            if self._graph is not None:
+                for row in rows:
+                    self._graph.mark_deleted(row)
+
+    def search(
+        self,
+        query: np.ndarray | list[float],
+        threshold: float,
+        project: str | None = None,
+        limit: int | None = None,
+        tags: list[str] | None = None,
+        after_ts: int | None = None,
+        before_ts: int | None = None,
+        exact: bool = False,
+    ) -> list[tuple[str, float]]:
+        """
+        Score every live vector that passes the filters with a single matrix-vector product.
+
+        Rows are unit length and the query is normalized once up front, so the
+        product is the cosine similarity with no per-row normalization.
+
+        Args:
+            query: Query embedding vector
+            threshold: Minimum cosine similarity to keep
+            project: Only score memories of this project
+            limit: Keep only the best `limit` matches (selected in O(N), not sorted);
+                searches over many candidates answer this from the HNSW graph
+            tags: Only score memories carrying at least one of these tags
+            after_ts: Only score memories created at or after this timestamp
+            before_ts: Only score memories created at or before this timestamp
+            exact: Never answer from the HNSW graph, so that the best `limit` matches are
+                always a prefix of the best `limit + n` (ties broken by insertion order)
+
+        Returns:
+            List of (memory_id, score) tuples, best match first
+        """
+        with self._lock:
+            if self._vectors is None or not self._row_by_id:
+                return []
+
+            query_vec = self._normalize_rows(np.asarray(query, dtype=_VECTOR_DTYPE)[None, :])[0]
+            is_filtered = bool(project or tags) or after_ts is not None or before_ts is not None
+            use_graph = limit is not None and self._graph is not None and not exact
+            if not is_filtered and use_graph:
+                graph_matches = self._search_graph(query_vec, threshold, limit)
+                if graph_matches is not None:
+                    return graph_matches
+
+            if is_filtered:
+                candidate_rows = self._filter_rows(project, tags, after_ts, before_ts)
+                if use_graph and self._prefers_filtered_graph(len(candidate_rows)):
+                    graph_matches = self._search_graph(query_vec, threshold, limit, allowed_rows=candidate_rows)
+                    if graph_matches is not None:
+                        return graph_matches
+                scores = self._vectors[candidate_rows] @ query_vec
+            else:
+                scores = self._vectors[: self._size] @ query_vec
+                candidate_rows = np.flatnonzero(self._alive[: self._size])
+                scores = scores[candidate_rows]
+
+            keep = np.flatnonzero(scores >= threshold)
+            if limit is not None and limit < len(keep):
+                if limit <= 0:
+                    return []
+                # Keep every row tied with the cutoff so the stable sort below settles ties by row
+                cutoff = -np.partition(-scores[keep], limit - 1)[limit - 1]
+                keep = keep[scores[keep] >= cutoff]
+            keep = keep[np.argsort(-scores[keep], kind="stable")][:limit]
+            return [(self._ids[candidate_rows[i]], float(scores[i])) for i in keep]
+
+    def _filter_rows(
+        self, project: str | None, tags: list[str] | None, after_ts: int | None, before_ts: int | None
+    ) -> np.ndarray:
+        """Return the live rows that pass every filter, without touching their vectors."""
+        if project:
+            rows = np.asarray(self._rows_by_project.get(project, []), dtype=np.intp)
+        else:
+            rows = np.arange(self._size, dtype=np.intp)
+
+        if tags:
+            tagged_rows = [self._rows_by_tag[tag] for tag in set(tags) if tag in self._rows_by_tag]
+            tag_rows = np.unique(np.concatenate(tagged_rows)) if tagged_rows else np.zeros(0, dtype=np.intp)
+            rows = np.intersect1d(rows, tag_rows, assume_unique=True)
+
+        rows = rows[self._alive[rows]]
+        if after_ts is not None:
+            rows = rows[self._created_at[rows] >= after_ts]
+        if before_ts is not None:
+            rows = rows[self._created_at[rows] <= before_ts]
+        return rows
+
+    def _prefers_filtered_graph(self, num_candidates: int) -> bool:
+        """Whether a filtered top-k should walk the graph rather than scan its candidates."""
+        return (
+            num_candidates >= _ANN_MIN_VECTORS
+            and num_candidates >= _ANN_MIN_FILTER_PASS_RATE * len(self._row_by_id)
+        )
+
+    def _search_graph(
+        self, query_vec: np.ndarray, threshold: float, limit: int | None, allowed_rows: np.ndarray | None = None
+    ) -> list[tuple[str, float]] | None:
+        """Approximate top-k using the HNSW graph, or None if the caller should scan instead."""
+        assert self._graph is not None and limit is not None
+        num_candidates = len(self._row_by_id) if allowed_rows is None else len(allowed_rows)
+        k = min(limit, num_candidates)
+        if k <= 0:
+            return []
+
+        # Filtered walks skip rows outside the candidate set while traversing
+        row_filter = None if allowed_rows is None else set(allowed_rows.tolist()).__contains__
+        self._graph.set_ef(max(_ANN_EF_SEARCH, k))
+        try:
+            labels, distances = self._graph.knn_query(query_vec, k=k, filter=row_filter)
+        except RuntimeError:
+            # hnswlib raises when the walk finds fewer than k reachable rows
+            return None
+        # Inner-product space reports 1 - dot, i.e. 1 - cosine for unit vectors
+        return [
+            (self._ids[row], score)
+            for row, score in zip(labels[0].tolist(), (1.0 - distances[0]).tolist())
+            if score >= threshold
+        ]
+
+    def _rebuild_graph(self, background: bool = True) -> None:
+        """
+        (Re)build the HNSW graph over the live rows, or drop it for small indexes.
+
+        A build touches every live row, so by default it runs on a worker thread and
+        searches use exact scans until the new graph is swapped in.
+        """
+        self._graph = None
+        if self._vectors is None or len(self._row_by_id) < _ANN_MIN_VECTORS:
+            return
+        if self._graph_build_layout == self._layout_version:
+            return  # A build over the current row numbering is already running
+
+        # Rows below _size are never rewritten in place, so the buffer itself is a stable snapshot
+        snapshot_vectors = self._vectors
+        snapshot_alive = self._alive[: self._size].copy()
+        if not background:
+            self._graph = self._build_graph(snapshot_vectors, snapshot_alive)
+            return
+
+        self._graph_build_layout = self._layout_version
+        threading.Thread(
+            target=self._build_graph_in_background,
+            args=(self._layout_version, snapshot_vectors, snapshot_alive),
+            daemon=True,
+        ).start()
+
+    def _build_graph_in_background(self, layout_version: int, vectors: np.ndarray, alive: np.ndarray) -> None:
+        """Build a graph from a snapshot without the lock, then catch it up and swap it in."""
+        try:
+            graph = self._build_graph(vectors, alive)
+        except Exception:
+            logger.exception("HNSW graph build failed; searches keep using exact scans.")
+            graph = None
+
+        with self._lock:
+            if self._graph_build_layout == layout_version:
+                self._graph_build_layout = None
+            if graph is None or layout_version != self._layout_version:
+                # Rows were renumbered meanwhile, and that change started its own build
+                return
+
+            # Apply the removals and appends that landed while the graph was being built
+            snapshot_size = len(alive)
+            assert self._vectors is not None
+            if graph.get_max_elements() < self._vectors.shape[0]:
+                graph.resize_index(self._vectors.shape[0])
+            for row in np.flatnonzero(alive & ~self._alive[:snapshot_size]).tolist():
+                graph.mark_deleted(row)
+            appended_rows = snapshot_size + np.flatnonzero(self._alive[snapshot_size : self._size])
+            if len(appended_rows):
+                graph.add_items(self._vectors[appended_rows], appended_rows)
+            self._graph = graph
+
+    def _build_graph(self, vectors: np.ndarray, alive: np.ndarray) -> hnswlib.Index:
+        """Index the live rows of a vector buffer in a new HNSW graph."""
+        live_rows = np.flatnonzero(alive)
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.init_index(max_elements=vectors.shape[0], M=_ANN_M, ef_construction=_ANN_EF_CONSTRUCTION)
+        graph.add_items(vectors[live_rows], live_rows)
+        logger.info(f"HNSW graph built over {len(live_rows)} vectors.")
+        return graph
+
+    def _allocate(self, capacity: int, dim: int) -> None:
+        """Create empty backing buffers."""
+        self._vectors = np.zeros((capacity, dim), dtype=_VECTOR_DTYPE)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._created_at = np.zeros(capacity, dtype=_TIMESTAMP_DTYPE)
+
+    def _make_room(self) -> None:
+        """Double capacity if most rows are live, otherwise compact tombstoned rows."""
+        assert self._vectors is not None
+        live_rows = np.flatnonzero(self._alive[: self._size])
+        capacity = self._vectors.shape[0]
+        if len(live_rows) > capacity // 2:
+            self._grow(capacity * 2)
+            return
+
+        live_vectors = self._vectors[live_rows]
+        live_created_at = self._created_at[live_rows]
+        live_ids = [self._ids[row] for row in live_rows]
+        live_projects = [self._projects[row] for row in live_rows]
+        live_tags = [self._tags[row] for row in live_rows]
+        self._allocate(capacity, live_vectors.shape[1])
+        assert self._vectors is not None
+
+        self._vectors[: len(live_rows)] = live_vectors
+        self._alive[: len(live_rows)] = True
+        self._created_at[: len(live_rows)] = live_created_at
+        self._set_rows(live_ids, live_projects, live_tags)
+        # Compaction renumbers rows, so the graph labels must be rebuilt too
+        self._layout_version += 1
+        self._rebuild_graph()
+
+    def _grow(self, capacity: int) -> None:
+        """Move every row into larger buffers, keeping row numbers (and graph labels) unchanged."""
+        assert self._vectors is not None
+        old_vectors, old_alive, old_created_at = self._vectors, self._alive, self._created_at
+        self._allocate(capacity, old_vectors.shape[1])
+        assert self._vectors is not None
+
+        self._vectors[: self._size] = old_vectors[: self._size]
+        self._alive[: self._size] = old_alive[: self._size]
+        self._created_at[: self._size] = old_created_at[: self._size]
+        if self._graph is not None:
+            self._graph.resize_index(capacity)
+
+    def _set_rows(self, memory_ids: list[str], projects: list[str | None], tags: list[list[str]]) -> None:
+        """Rebuild the id, project and tag lookups for densely packed rows."""
+        self._ids = memory_ids
+        self._projects = projects
+        self._tags = tags
+        self._row_by_id = {memory_id: row for row, memory_id in enumerate(memory_ids)}
+        self._rows_by_project = {}
+        for row, project in enumerate(projects):
+            self._rows_by_project.setdefault(project, []).append(row)
+        self._rows_by_tag = {}
+        for row, memory_tags in enumerate(tags):
+            for tag in memory_tags:
+                self._rows_by_tag.setdefault(tag, []).append(row)
+        self._size = len(memory_ids)
+
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize each row, leaving zero-norm rows as zeros."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
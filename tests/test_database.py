@@ -0,0 +1,83 @@
+"""Tests for the SQLite persistence layer."""
+
+import numpy as np
+import pytest
+
+from src.database import DataPersistence
+from src.models import MemoryRecord
+from src.utils import create_content_hash
+
+
+def _make_record(memory_id: str, text: str, tags: list[str] | None = None) -> MemoryRecord:
+    """Build a memory with a deterministic unit-length embedding."""
+    embedding = np.random.default_rng(len(memory_id)).standard_normal(8).astype(np.float32)
+    return MemoryRecord(
+        id=memory_id,
+        text=text,
+        text_hash=create_content_hash(text),
+        embedding=embedding / np.linalg.norm(embedding),
+        project="test",
+        tags=tags or [],
+        created_at=1700000000,
+        updated_at=1700000000,
+    )
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A freshly initialized database in a temporary directory."""
+    persistence = DataPersistence(str(tmp_path / "memory.db"))
+    persistence.initialize_connection()
+    yield persistence
+    persistence.close_connection()
+
+
+def test_persist_memory_records_skips_duplicates(db):
+    """Batch saves skip texts that are already active or repeated within the batch."""
+    assert db.persist_memory_record(_make_record("existing", "already saved", ["old"]))
+
+    inserted_ids = db.persist_memory_records(
+        [
+            _make_record("new-1", "first new text", ["a"]),
+            _make_record("dup-active", "already saved", ["b"]),
+            _make_record("new-2", "second new text", ["c"]),
+            _make_record("dup-batch", "first new text", ["d"]),
+        ]
+    )
+
+    assert inserted_ids == ["new-1", "new-2"]
+    assert db.count_total_memories() == 3
+    assert db.fetch_memory_by_uuid("dup-active") is None
+    assert db.fetch_memory_by_uuid("dup-batch") is None
+    assert db.count_total_memories(tags=["b"]) == 0
+    assert db.count_total_memories(tags=["d"]) == 0
+    assert len(db.embedding_index) == 3
+
+
+def test_iter_paginated_memories_resumes_batches_without_holding_a_reader(db, monkeypatch):
+    """Streamed batches match the paged listing and give the read connection back between yields."""
+    db.persist_memory_records([_make_record(f"m-{i}", f"text {i}") for i in range(7)])
+    monkeypatch.setattr("src.database.app_config.db_read_pool_timeout", 0.1)
+
+    batches = db.iter_paginated_memories(limit=6, offset=0, batch_size=2)
+    streamed = []
+    for batch in batches:
+        # Every pooled connection is free while the consumer holds a batch
+        assert db._read_pool.qsize() == len(db._read_connections)
+        streamed.extend(record.id for record in batch)
+
+    listed = [record.id for record in db.retrieve_paginated_memories(limit=6)]
+    assert streamed == listed
+    assert len(set(streamed)) == 6
+
+
+def test_reader_times_out_when_the_pool_is_exhausted(db, monkeypatch):
+    """Borrowing from an empty pool fails with a clear error instead of blocking forever."""
+    monkeypatch.setattr("src.database.app_config.db_read_pool_timeout", 0.05)
+    borrowed = [db._read_pool.get() for _ in range(len(db._read_connections))]
+    try:
+        with pytest.raises(RuntimeError, match="No read-only database connection became free"):
+            db.count_total_memories()
+    finally:
+        for conn in borrowed:
+            db._read_pool.put(conn)
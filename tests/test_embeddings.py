@@ -0,0 +1,112 @@
+"""Tests for embedding model loading and encoding."""
+
+import contextlib
+import importlib
+import sys
+import types
+
+import numpy as np
+import pytest
+
+_DIM = 8
+
+
+class _PinnedSentenceTransformer:
+    """Stand-in with the constructor and encode signatures of sentence-transformers 2.7.0."""
+
+    instances: list["_PinnedSentenceTransformer"] = []
+
+    def __init__(
+        self,
+        model_name_or_path=None,
+        modules=None,
+        device=None,
+        prompts=None,
+        default_prompt_name=None,
+        cache_folder=None,
+        trust_remote_code=False,
+        revision=None,
+        token=None,
+        use_auth_token=None,
+        truncate_dim=None,
+    ):
+        self.device = device
+        self.is_half = False
+        _PinnedSentenceTransformer.instances.append(self)
+
+    def half(self):
+        self.is_half = True
+        return self
+
+    def eval(self):
+        return self
+
+    def get_sentence_embedding_dimension(self):
+        return _DIM
+
+    def encode(
+        self,
+        sentences,
+        prompt_name=None,
+        prompt=None,
+        batch_size=32,
+        show_progress_bar=None,
+        output_value="sentence_embedding",
+        precision="float32",
+        convert_to_numpy=True,
+        convert_to_tensor=False,
+        device=None,
+        normalize_embeddings=False,
+    ):
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        vectors = np.stack([np.random.default_rng(len(text)).standard_normal(_DIM) for text in texts])
+        vectors = vectors.astype(np.float32)
+        if normalize_embeddings:
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors[0] if isinstance(sentences, str) else vectors
+
+
+@pytest.fixture
+def embeddings_module(monkeypatch):
+    """Import src.embeddings against the pinned sentence-transformers API (and a torch stand-in if missing)."""
+    sentence_transformers = types.ModuleType("sentence_transformers")
+    sentence_transformers.SentenceTransformer = _PinnedSentenceTransformer
+    monkeypatch.setitem(sys.modules, "sentence_transformers", sentence_transformers)
+    try:
+        import torch  # noqa: F401
+    except ImportError:
+        torch = types.ModuleType("torch")
+        torch.inference_mode = contextlib.nullcontext
+        monkeypatch.setitem(sys.modules, "torch", torch)
+
+    _PinnedSentenceTransformer.instances = []
+    original_module = sys.modules.pop("src.embeddings", None)
+    try:
+        yield importlib.import_module("src.embeddings")
+    finally:
+        sys.modules.pop("src.embeddings", None)
+        if original_module is not None:
+            sys.modules["src.embeddings"] = original_module
+
+
+@pytest.mark.parametrize(("device", "expect_half"), [("cpu", False), ("cuda", True)])
+def test_model_loads_with_pinned_sentence_transformers(embeddings_module, device, expect_half):
+    """The model loads under the pinned constructor signature, in half precision off-CPU."""
+    service = embeddings_module.VectorizationService()
+    service.device = device
+    service.initialize_transformer()
+
+    (model,) = _PinnedSentenceTransformer.instances
+    assert model.device == device
+    assert model.is_half is expect_half
+    assert service.embedding_dim == _DIM
+
+
+def test_generate_embedding_uses_pinned_encode_signature(embeddings_module):
+    """Single-text encoding goes through the pinned encode signature and returns a unit vector."""
+    service = embeddings_module.VectorizationService()
+    vector = service.generate_embedding("hello world")
+
+    assert vector.shape == (_DIM,)
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert service.generate_embeddings_batch(["a", "bb"]).shape == (2, _DIM)
@@ -0,0 +1,104 @@
+"""Tests for the in-memory embedding index."""
+
+import threading
+import time
+
+import numpy as np
+
+from src.vector_index import _ANN_MIN_VECTORS, EmbeddingIndex
+
+_DIM = 16
+
+
+def _random_vectors(count: int, seed: int = 0) -> np.ndarray:
+    """Random float32 vectors; the index normalizes them on the way in."""
+    return np.random.default_rng(seed).standard_normal((count, _DIM)).astype(np.float32)
+
+
+def _load_index(count: int) -> EmbeddingIndex:
+    """An index bulk-loaded with `count` vectors, large enough to carry a graph."""
+    index = EmbeddingIndex()
+    index.load([str(i) for i in range(count)], _random_vectors(count), [None] * count, [[]] * count, [0] * count)
+    return index
+
+
+def _wait_for_graph(index: EmbeddingIndex, timeout: float = 10.0) -> None:
+    """Block until a background graph build has been swapped in."""
+    deadline = time.monotonic() + timeout
+    while index._graph is None:
+        assert time.monotonic() < deadline, "graph build did not finish"
+        time.sleep(0.01)
+
+
+def test_growth_keeps_graph_without_rebuild():
+    """Doubling capacity resizes the existing graph instead of rebuilding it."""
+    index = _load_index(_ANN_MIN_VECTORS)
+    graph = index._graph
+    assert graph is not None
+
+    extra = _random_vectors(_ANN_MIN_VECTORS, seed=1)
+    for i, vector in enumerate(extra):
+        index.add(f"extra-{i}", vector)
+
+    assert index._graph is graph
+    assert graph.get_current_count() == 2 * _ANN_MIN_VECTORS
+    assert index.search(extra[5], threshold=0.99, limit=1)[0][0] == "extra-5"
+
+
+def test_compaction_rebuilds_graph_off_the_lock_and_catches_up():
+    """Writes during a background rebuild land in the graph that is swapped in."""
+    index = _load_index(2 * _ANN_MIN_VECTORS)
+    capacity = index._vectors.shape[0]
+
+    build_started = threading.Event()
+    release_build = threading.Event()
+    build_graph = index._build_graph
+
+    def paused_build(vectors, alive):
+        build_started.set()
+        assert release_build.wait(10)
+        return build_graph(vectors, alive)
+
+    index._build_graph = paused_build
+
+    # Tombstone most rows, then fill the buffer so the next add compacts it
+    index.remove_many([str(i) for i in range(capacity // 2 + 1)])
+    fillers = _random_vectors(capacity - index._size, seed=2)
+    for i, vector in enumerate(fillers):
+        index.add(f"filler-{i}", vector)
+    late = _random_vectors(2, seed=3)
+    index.add("late-0", late[0])
+    assert build_started.wait(10)
+
+    # The lock is free while the graph builds: searches fall back to exact scans and writes go through
+    assert index._graph is None
+    assert index.search(late[0], threshold=0.99, limit=1)[0][0] == "late-0"
+    index.add("late-1", late[1])
+    index.remove("late-0")
+
+    release_build.set()
+    _wait_for_graph(index)
+
+    late_1_row = index._row_by_id["late-1"]
+    assert late_1_row in index._graph.get_ids_list()
+    assert index.search(late[1], threshold=0.99, limit=1)[0][0] == "late-1"
+    assert "late-0" not in {memory_id for memory_id, _ in index.search(late[0], threshold=-1.0, limit=5)}
+
+
+def test_exact_relevance_pages_cover_every_match_once():
+    """Walking exact top-k pages over a graph-backed index yields each memory exactly once, ties included."""
+    index = _load_index(2 * _ANN_MIN_VECTORS)
+    assert index._graph is not None
+    duplicate = _random_vectors(1, seed=4)[0]
+    for i in range(5):
+        index.add(f"tie-{i}", duplicate)
+
+    query = _random_vectors(1, seed=5)[0]
+    page_size = 37
+    seen: list[str] = []
+    for page_offset in range(0, len(index._row_by_id), page_size):
+        ranked = index.search(query, threshold=-1.0, limit=page_offset + page_size, exact=True)
+        seen.extend(memory_id for memory_id, _ in ranked[page_offset:])
+
+    assert len(seen) == len(set(seen)) == len(index._row_by_id)
+    assert [memory_id for memory_id, _ in index.search(query, threshold=-1.0)] == seen